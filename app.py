@@ -1,24 +1,41 @@
+from datetime import date
+
 import streamlit as st
-from k401 import calculate_401k_contribution, fetch_latest_401k_limit
+from contribution_limits import cache_updated_at, get_401k_limit, latest_limit_year, refresh_in_background, table_version
+from k401 import PAY_FREQUENCIES, calculate_401k_contribution
+
+# numpy, pandas and altair are imported only when the what-if sweep is opened
 
 st.title("💼 401(k) Contribution Calculator")
 st.write("Use this app to estimate how much you should contribute per pay period to hit your 401(k) target.")
 
 
 
-@st.cache_data(ttl=86400)
-def get_dynamic_limit():
-    return fetch_latest_401k_limit()
-limit = get_dynamic_limit()
-st.info(f"IRS 401(k) contribution limit for this year: **${limit:,}**")
+# Render from the known limits; a stale cache is refreshed on a background thread
+refresh_in_background()
+try:
+    limit = get_401k_limit()
+    st.info(f"IRS 401(k) contribution limit for this year: **${limit:,}**")
+except KeyError:
+    # This year's limit is not published or refreshed yet; say which year's limit is shown
+    limit_year = latest_limit_year()
+    limit = get_401k_limit(limit_year)
+    st.warning(f"The {date.today().year} limit is not known yet. Showing the {limit_year} limit of "
+               f"**${limit:,}**; check the IRS announcement before relying on it.")
+limits_updated_at = cache_updated_at()
+if limits_updated_at:
+    st.caption(f"Limit last updated {limits_updated_at:%Y-%m-%d %H:%M}")
+else:
+    st.caption(f"Limit from the bundled limits table (version {table_version()})")
 
 # Input fields
 col1, col2 = st.columns(2)
 with col1:
     year = st.number_input("Year of First Pay Period", min_value=2020, max_value=2100, value=2025)
     month = st.number_input("Month of your First Paycheck(1–12)", min_value=1, max_value=12, value=1)
+    frequency = st.selectbox("Pay Frequency", list(PAY_FREQUENCIES), index=list(PAY_FREQUENCIES).index("biweekly"))
 with col2:
-    gross_pay = st.number_input("Bi-weekly Gross Pay ($)", min_value=0.0, value=5000.0, step=100.0)
+    gross_pay = st.number_input("Gross Pay per Paycheck ($)", min_value=0.0, value=5000.0, step=100.0)
     contributions_so_far = st.number_input("Total Contribution So Far ($)", min_value=0.0, value=10000.0, step=100.0)
 
 
@@ -28,7 +45,7 @@ annual_limit = st.number_input(
     value=float(limit),
     step=100.0
 )
-effective_periods = st.number_input("Effective After How Many Pay Periods?", min_value=0, max_value=26, value=0)
+effective_periods = st.number_input("Effective After How Many Pay Periods?", min_value=0, max_value=PAY_FREQUENCIES[frequency], value=0)
 
 if st.button("Calculate"):
     result = calculate_401k_contribution(
@@ -37,7 +54,8 @@ if st.button("Calculate"):
         gross_pay,
         contributions_so_far,
         annual_limit,
-        effective_periods
+        effective_periods,
+        frequency
     )
 
     st.subheader("📊 Results")
@@ -45,9 +63,60 @@ if st.button("Calculate"):
     st.write(f"**Remaining Amount:** ${result['remaining_amount']:.2f}")    
     st.write(f"**Amount per Pay Period:** ${result['amount_per_period']:.2f}")
     st.success(f"✅ New Contribution Percentage: **{result['percent_per_period']:.2f}%**")
-    result = calculate_401k_contribution(
-    year, month, gross_pay, contributions_so_far, annual_limit, effective_periods
+
+
+@st.cache_data(max_entries=64)
+def sweep_grid(year, month, frequency, annual_limit, pay_range, contribution_range,
+               effective_range, steps, as_of):
+    """Required percentage over a grid of gross pay x contributions x effective periods, in one batch call."""
+    import numpy as np
+    import pandas as pd
+    from k401_batch import calculate_401k_contribution_batch
+
+    pays = np.linspace(*pay_range, steps).round(2)
+    contributions = np.linspace(*contribution_range, steps).round(2)
+    effectives = np.arange(effective_range[0], effective_range[1] + 1)
+    pay_grid, contribution_grid, effective_grid = (a.ravel() for a in np.meshgrid(pays, contributions, effectives))
+
+    result = calculate_401k_contribution_batch(
+        year, month, pay_grid, contribution_grid, annual_limit, effective_grid,
+        as_of=as_of, frequency=frequency)
+    return pd.DataFrame({
+        "gross_pay": pay_grid,
+        "contributions_so_far": contribution_grid,
+        "effective_periods": effective_grid,
+        "periods_left": result["periods_left"],
+        "percent_per_period": result["percent_per_period"].round(2),
+    })
+
+
+st.subheader("🧮 What-if Sweep")
+if st.toggle("Show the what-if sweep"):
+    import altair as alt
+
+    st.write("See the required percentage across a range of paychecks and contributions so far.")
+    sweep_col1, sweep_col2 = st.columns(2)
+    with sweep_col1:
+        pay_range = st.slider("Gross Pay Range ($)", min_value=0, max_value=50000,
+                              value=(int(gross_pay * 0.5), min(int(gross_pay * 1.5), 50000)), step=100)
+        effective_range = st.slider("Effective After (Pay Periods)", min_value=0, max_value=PAY_FREQUENCIES[frequency],
+                                    value=(0, min(3, PAY_FREQUENCIES[frequency])))
+    with sweep_col2:
+        contribution_range = st.slider("Contribution So Far Range ($)", min_value=0, max_value=max(int(annual_limit), 100),
+                                       value=(0, max(int(annual_limit), 100)), step=100)
+        steps = st.slider("Grid Steps per Axis", min_value=5, max_value=30, value=15)
+
+    grid = sweep_grid(year, month, frequency, annual_limit, pay_range, contribution_range,
+                      effective_range, steps, date.today())
+    shown_effective = st.select_slider("Show Effective After", options=list(range(effective_range[0], effective_range[1] + 1)))
+    heatmap = alt.Chart(grid[grid["effective_periods"] == shown_effective]).mark_rect().encode(
+        x=alt.X("gross_pay:O", title="Gross Pay per Paycheck ($)", axis=alt.Axis(format=",.0f")),
+        y=alt.Y("contributions_so_far:O", title="Contribution So Far ($)", sort="descending", axis=alt.Axis(format=",.0f")),
+        color=alt.Color("percent_per_period:Q", title="% per Paycheck", scale=alt.Scale(scheme="viridis")),
+        tooltip=["gross_pay", "contributions_so_far", "effective_periods", "periods_left", "percent_per_period"],
     )
+    st.altair_chart(heatmap, width='stretch')
+    st.caption(f"{len(grid):,} scenarios computed in one vectorized pass")
 
 
 
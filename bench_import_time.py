@@ -0,0 +1,84 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from argparse import ArgumentParser
+from datetime import datetime
+
+# Modules on the app's cold start path; k401 must stay standard-library only
+MODULES = ("k401", "contribution_limits", "k401_batch", "streamlit")
+STDLIB_ONLY = ("k401", "contribution_limits")
+
+_THIRD_PARTY_CHECK = """
+import sys
+before = set(sys.modules)
+import {module}
+loaded = {{name.split(".")[0] for name in set(sys.modules) - before}}
+print(" ".join(sorted(name for name in loaded
+                      if name not in sys.stdlib_module_names and not name.startswith("_")
+                      and name not in {local})))
+"""
+
+
+def get_params():
+    parser = ArgumentParser(prog='bench_import_time.py', description='Measure cold import time of the 401(k) app modules')
+    parser.add_argument("-m", "--modules", action="store", nargs="+", default=list(MODULES))
+    parser.add_argument("-r", "--repeat", action="store", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--log", action="store", help="Append results as a JSON line to this file")
+    return parser.parse_args(sys.argv[1:])
+
+
+def import_time_us(module):
+    """Cumulative import time of `module` in a fresh interpreter, from -X importtime."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    for line in reversed(proc.stderr.splitlines()):
+        # import time: self [us] | cumulative | imported package
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    raise RuntimeError(f"No import time reported for {module}")
+
+
+def third_party_imports(module):
+    """Non-standard-library packages that `import module` pulls in."""
+    local = {name[:-3] for name in os.listdir(os.path.dirname(os.path.abspath(__file__))) if name.endswith(".py")}
+    proc = subprocess.run([sys.executable, "-c", _THIRD_PARTY_CHECK.format(module=module, local=local)],
+                          capture_output=True, text=True, check=True,
+                          cwd=os.path.dirname(os.path.abspath(__file__)))
+    return proc.stdout.split()
+
+
+def main():
+    params = get_params()
+    results = {}
+    for module in params.modules:
+        try:
+            times = [import_time_us(module) for _ in range(params.repeat)]
+        except RuntimeError as e:
+            print(e)
+            continue
+        results[module] = statistics.median(times) / 1000
+        print(f"import {module:<22} {results[module]:8.1f} ms (median of {params.repeat})")
+
+    failed = False
+    for module in STDLIB_ONLY:
+        if module in params.modules:
+            extra = third_party_imports(module)
+            if extra:
+                print(f"import {module} pulls in non-stdlib packages: {', '.join(extra)}")
+                failed = True
+
+    if params.log:
+        with open(params.log, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"timestamp": datetime.now().isoformat(timespec="seconds"),
+                                "python": sys.version.split()[0], "import_ms": results}) + "\n")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
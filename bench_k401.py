@@ -0,0 +1,222 @@
+import contextlib
+import json
+import math
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import time
+from argparse import ArgumentParser
+from datetime import date
+
+import numpy as np
+
+from k401 import (PAY_FREQUENCIES, _memoized_contribution_core, calculate_401k_contribution,
+                  calculate_pay_periods, contribution_core, second_friday_of_month)
+from k401_batch import calculate_401k_contribution_batch
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_k401_baseline.json")
+POPULATION_SIZES = (1_000, 100_000, 1_000_000)
+
+# Scalar functions are timed on at most this many scenarios of each population;
+# their per-scenario cost does not grow with the population
+SCALAR_LIMIT = 10_000
+
+# Fixed date so runs are comparable no matter when they happen
+AS_OF = date(2025, 6, 15)
+
+# Each benchmark reports the median of ROUNDS rounds, each calling the function
+# enough times to run at least MIN_ROUND_SECONDS, so short timings are not noise
+ROUNDS = 15
+MIN_ROUND_SECONDS = 0.1
+
+# Iterations of the fixed reference loop timed between rounds. Shared machines swing
+# between fast and slow phases lasting seconds (wall times of unchanged code moved 80%);
+# the cost relative to the loop timed alongside moved about 10%, so that is what is gated
+REFERENCE_ITERATIONS = 100_000
+
+# A baseline is the per-benchmark median of this many full runs
+BASELINE_RUNS = 3
+
+# Allowed slowdown of the relative cost against the baseline. Runs of unchanged code
+# came within -21%..+34% of a 3-run baseline, the widest on the memory-bound 1M-row
+# batch benchmarks, which the reference loop tracks least well
+THRESHOLD = 0.5
+
+
+def get_params():
+    parser = ArgumentParser(prog='bench_k401.py', description='Benchmark the k401 calculation hot path against a saved baseline')
+    parser.add_argument("-s", "--sizes", action="store", type=int, nargs="+", default=list(POPULATION_SIZES), help="Population sizes to run")
+    parser.add_argument("-r", "--rounds", action="store", type=int, default=ROUNDS, help="Timed rounds per benchmark (the median is reported)")
+    parser.add_argument("--scalar-limit", action="store", type=int, default=SCALAR_LIMIT, help="Cap on scenarios timed through the scalar functions")
+    parser.add_argument("--threshold", action="store", type=float, default=THRESHOLD, help="Allowed slowdown against the baseline (0.5 = 50%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the median of --baseline-runs runs as the new baseline")
+    parser.add_argument("--baseline-runs", action="store", type=int, default=BASELINE_RUNS, help="Full runs a saved baseline is the median of")
+    parser.add_argument("--baseline", action="store", default=BASELINE_FILE)
+    return parser.parse_args(sys.argv[1:])
+
+
+def synthetic_population(size, seed=401):
+    """Random scenarios as column arrays: start year/month, pay, YTD contributions, limit, effective periods."""
+    rng = np.random.default_rng(seed)
+    return {
+        "years": rng.choice([2024, 2025, 2026], size),
+        "months": rng.integers(1, 13, size),
+        "gross_pay": rng.uniform(1_000, 10_000, size).round(2),
+        "contributions_so_far": rng.uniform(0, 25_000, size).round(2),
+        "annual_limit": np.full(size, 23_500.0),
+        "effective_periods": rng.integers(0, 4, size),
+    }
+
+
+def reference_loop(iterations=REFERENCE_ITERATIONS):
+    """Fixed interpreter workload that benchmark timings are measured against."""
+    totals = {}
+    for i in range(iterations):
+        totals[i % 1000] = totals.get(i % 1000, 0.0) + i * 0.5
+
+
+def time_per_scenario(func, count, rounds=ROUNDS, min_round_seconds=MIN_ROUND_SECONDS):
+    """
+    Time func() over rounds, with the reference loop timed between rounds. Returns the
+    median wall time in nanoseconds per scenario, and the median relative cost: the time
+    per scenario in iterations of the reference loop timed on either side of the round.
+    """
+    def call():
+        # Time cold scenarios, not memoized repeats from the previous call
+        _memoized_contribution_core.cache_clear()
+        func()
+
+    def elapsed(f):
+        start = time.perf_counter()
+        f()
+        return time.perf_counter() - start
+
+    # calculate_401k_contribution prints when it clamps effective periods
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        # The warm-up call fills the pay calendar cache and sizes the rounds
+        calls = max(1, math.ceil(min_round_seconds / elapsed(call)))
+        references = [elapsed(reference_loop)]
+        timings = []
+        for _ in range(rounds):
+            timings.append(elapsed(lambda: [call() for _ in range(calls)]) / calls / count)
+            references.append(elapsed(reference_loop))
+    relative = [timing / ((before + after) / 2) * REFERENCE_ITERATIONS
+                for timing, before, after in zip(timings, references, references[1:])]
+    return statistics.median(timings) * 1e9, statistics.median(relative)
+
+
+def run_benchmarks(sizes, scalar_limit=SCALAR_LIMIT, rounds=ROUNDS):
+    """
+    Return {benchmark name: (ns per scenario, relative cost)} for every size and
+    pay frequency; see time_per_scenario.
+    """
+    results = {}
+    for size in sizes:
+        population = synthetic_population(size)
+
+        # Scalar results are labelled with the rows actually timed; a population past
+        # scalar_limit times as many rows as one of scalar_limit, so it is only timed once
+        n = min(size, scalar_limit)
+        time_scalar = f"second_friday_of_month/{n}" not in results
+        rows = list(zip(*(population[name][:n].tolist() for name in (
+            "years", "months", "gross_pay", "contributions_so_far", "annual_limit", "effective_periods"))))
+        starts = [second_friday_of_month(year, month) for year, month, *_ in rows]
+
+        if time_scalar:
+            results[f"second_friday_of_month/{n}"] = time_per_scenario(
+                lambda: [second_friday_of_month(year, month) for year, month, *_ in rows], n, rounds)
+            results[f"calculate_pay_periods/{n}"] = time_per_scenario(
+                lambda: [calculate_pay_periods(start) for start in starts], n, rounds)
+
+        for frequency in PAY_FREQUENCIES:
+            if time_scalar:
+                results[f"contribution_core/{frequency}/{n}"] = time_per_scenario(
+                    lambda: [contribution_core(*row, AS_OF, frequency) for row in rows], n, rounds)
+                results[f"calculate_401k_contribution/{frequency}/{n}"] = time_per_scenario(
+                    lambda: [calculate_401k_contribution(*row, frequency=frequency, as_of=AS_OF) for row in rows],
+                    n, rounds)
+            results[f"calculate_401k_contribution_batch/{frequency}/{size}"] = time_per_scenario(
+                lambda: calculate_401k_contribution_batch(
+                    population["years"], population["months"], population["gross_pay"],
+                    population["contributions_so_far"], population["annual_limit"],
+                    population["effective_periods"], as_of=AS_OF, frequency=frequency),
+                size, rounds)
+
+        print(f"Finished population of {size:,}", file=sys.stderr)
+    return results
+
+
+def _send_benchmarks(connection, *args):
+    connection.send(run_benchmarks(*args))
+    connection.close()
+
+
+def run_in_fresh_process(*args):
+    """
+    run_benchmarks in a new process, as a check run is. Runs after the first in one
+    process find the allocator warm, which made the batch benchmarks up to 60% faster.
+    """
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_send_benchmarks, args=(sender, *args))
+    process.start()
+    sender.close()
+    try:
+        return receiver.recv()
+    finally:
+        process.join()
+
+
+def compare(results, baseline, threshold):
+    """Print each benchmark against the baseline; return the names whose relative cost regressed."""
+    regressions = []
+    print(f"{'benchmark':<55} {'ns/scenario':>12} {'relative':>10} {'baseline':>10} {'change':>8}")
+    for name, (ns, value) in results.items():
+        base = baseline.get(name)
+        if base:
+            change = value / base - 1
+            flag = "  REGRESSION" if change > threshold else ""
+            print(f"{name:<55} {ns:>12,.0f} {value:>10,.2f} {base:>10,.2f} {change:>+8.1%}{flag}")
+            if flag:
+                regressions.append(name)
+        else:
+            print(f"{name:<55} {ns:>12,.0f} {value:>10,.2f} {'-':>10} {'-':>8}")
+    return regressions
+
+
+def main():
+    params = get_params()
+
+    if params.save_baseline:
+        runs = [run_in_fresh_process(params.sizes, params.scalar_limit, params.rounds)
+                for _ in range(max(1, params.baseline_runs))]
+        with open(params.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "machine": platform.machine(),
+                "reference_iterations": REFERENCE_ITERATIONS,
+                # Relative costs, which the regression check compares
+                "results": {name: round(statistics.median(run[name][1] for run in runs), 3) for name in runs[0]},
+                "ns_per_scenario": {name: round(statistics.median(run[name][0] for run in runs), 1) for name in runs[0]},
+            }, f, indent=2)
+            f.write("\n")
+        print(f"Baseline saved to {params.baseline}")
+        return
+
+    results = run_benchmarks(params.sizes, params.scalar_limit, params.rounds)
+    try:
+        with open(params.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    except FileNotFoundError:
+        baseline = {}
+    regressions = compare(results, baseline, params.threshold)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {params.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import contextlib
+import os
+import re
+import sys
+import time
+from argparse import ArgumentParser
+
+from ptr_extract import TEXT_CACHE_DIR, clean_extracted_text, parse_transactions
+
+# Saved PTR text (as extracted by pdfplumber) the parsers are timed on
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_ptr_corpus.txt")
+
+# The corpus is repeated until it has at least this many lines, so timings are stable
+MIN_LINES = 200_000
+
+
+def get_params():
+    parser = ArgumentParser(prog='bench_ptr_parser.py', description='Benchmark the PTR transaction parser against the legacy line parser')
+    parser.add_argument("-c", "--corpus", action="store", default=CORPUS_FILE,
+                        help=f"Text file, or a directory of extracted text such as {TEXT_CACHE_DIR}")
+    parser.add_argument("--min-lines", action="store", type=int, default=MIN_LINES)
+    parser.add_argument("-r", "--repeat", action="store", type=int, default=5, help="Timed rounds per parser (best is reported)")
+    return parser.parse_args(sys.argv[1:])
+
+
+def legacy_parse_transactions(data):
+    """The line parser parse_transactions replaced, kept verbatim as the benchmark baseline."""
+    lines = data.split("\n")
+    transactions = []
+    ticker = None
+    transaction_type = None
+    transaction_date = None
+    description = None
+    for line in lines:
+        line = line.strip()
+        ticker_match = re.search(r'\((\w+)\)', line)
+        if ticker_match:
+            ticker = ticker_match.group(1)
+        if 'P' in line or 'S' in line:
+            if 'P' in line:
+                transaction_type = 'P'
+            elif 'S' in line:
+                transaction_type = 'S'
+        date_match = re.search(r'(\d{2}/\d{2}/\d{4})', line)
+        if date_match:
+            transaction_date = date_match.group(1)
+        if 'D:' or 'DESCRIPTION:' or 'S O:' in line.upper():
+            print(f"Processing line: {line}")
+            description_match = re.search(r'D:\s*(.*)|DESCRIPTION:\s*(.*)|O:\s*(.*)', line)
+            if description_match:
+                description = description_match.group(0).strip()
+                if ticker and transaction_type and transaction_date and description:
+                    transactions.append({
+                        "asset": ticker,
+                        "transaction_type": transaction_type,
+                        "transaction_date": transaction_date,
+                        "description": description
+                    })
+                    ticker = transaction_type = transaction_date = description = None
+    return transactions
+
+
+def load_corpus(path):
+    """Cleaned filing texts from a file, or from every .txt file under a directory."""
+    if os.path.isdir(path):
+        texts = []
+        for dirpath, _, files in os.walk(path):
+            for name in sorted(files):
+                if name.endswith(".txt"):
+                    with open(os.path.join(dirpath, name), encoding="utf-8") as f:
+                        texts.append(f.read())
+        return texts
+    with open(path, encoding="utf-8") as f:
+        return [clean_extracted_text(f.read())]
+
+
+def lines_per_second(parse, texts, line_count, repeat):
+    """Best-of-repeat throughput of parse over texts, and the transactions it found."""
+    best = float("inf")
+    # The legacy parser prints every line it sees
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            found = sum(len(parse(text)) for text in texts)
+            best = min(best, time.perf_counter() - start)
+    return line_count / best, found
+
+
+def main():
+    params = get_params()
+    texts = load_corpus(params.corpus)
+    corpus_lines = sum(text.count("\n") + 1 for text in texts)
+    if not corpus_lines or not any(texts):
+        print(f"No filing text found in {params.corpus}")
+        sys.exit(1)
+    copies = max(1, -(-params.min_lines // corpus_lines))
+    texts = texts * copies
+    line_count = corpus_lines * copies
+    print(f"{len(texts):,} filings, {line_count:,} lines ({copies} copies of {params.corpus})")
+
+    results = {}
+    for name, parse in (("legacy", legacy_parse_transactions), ("tokenizer", parse_transactions)):
+        results[name], found = lines_per_second(parse, texts, line_count, params.repeat)
+        print(f"{name:<10} {results[name]:>14,.0f} lines/s {found // copies:>6} transactions per corpus copy")
+    print(f"speedup    {results['tokenizer'] / results['legacy']:>14.2f}x")
+
+
+if __name__ == "__main__":
+    main()
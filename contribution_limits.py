@@ -0,0 +1,210 @@
+import json
+import os
+import re
+import sys
+import threading
+from argparse import ArgumentParser
+from datetime import date, datetime, timedelta
+
+# Versioned limits table shipped with the code; authoritative for the years it covers
+LIMITS_TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "contribution_limits.json")
+
+# On-disk cache for limits fetched by --refresh (years the shipped table does not cover yet)
+CACHE_FILE = os.environ.get(
+    "K401_LIMITS_CACHE",
+    os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "k401", "contribution_limits.json"),
+)
+
+LIMITS_URL = "https://www.fidelity.com/learning-center/smart-money/401k-contribution-limits"
+
+# Background refreshes: how old the cache may get, and how often a failed refresh is retried
+REFRESH_MAX_AGE = timedelta(days=1)
+REFRESH_RETRY_INTERVAL = timedelta(hours=1)
+
+_limits = None
+_refresh_lock = threading.Lock()
+_last_refresh_attempt = None
+
+
+def is_offline():
+    """Offline mode (K401_OFFLINE=1) forbids any network access, including --refresh."""
+    return os.environ.get("K401_OFFLINE", "").lower() in ("1", "true", "yes")
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_limits(reload=False):
+    """
+    Return {year: {limit_name: amount}} from the cache overlaid with the shipped table.
+    The shipped table wins, so results for a covered tax year never depend on the cache:
+    a refresh only adds years the table does not cover yet, and correcting a covered
+    year means updating contribution_limits.json.
+    """
+    global _limits
+    if _limits is None or reload:
+        limits = {int(year): values for year, values in _read_json(CACHE_FILE).get("limits", {}).items()}
+        limits.update({int(year): values for year, values in _read_json(LIMITS_TABLE)["limits"].items()})
+        _limits = limits
+    return _limits
+
+
+def table_version():
+    """Version string of the shipped limits table."""
+    return _read_json(LIMITS_TABLE).get("version")
+
+
+def cache_updated_at():
+    """When the on-disk cache was last refreshed, or None if it was never written."""
+    fetched_at = _read_json(CACHE_FILE).get("fetched_at")
+    return datetime.fromisoformat(fetched_at) if fetched_at else None
+
+
+def get_limits(year=None):
+    """
+    Return the limits for a tax year: elective_deferral (402(g)), catch_up (age 50+),
+    catch_up_60_63 where it applies, and annual_additions (415(c)).
+    Raises KeyError if the year is not in the table or the cache.
+    """
+    year = year or date.today().year
+    limits = load_limits()
+    if year not in limits:
+        raise KeyError(f"No 401(k) limits known for {year}; run `python contribution_limits.py --refresh`")
+    return dict(limits[year])
+
+
+def latest_limit_year():
+    """Most recent tax year with known limits."""
+    return max(load_limits())
+
+
+def get_401k_limit(year=None):
+    """
+    Elective deferral limit for a tax year, without touching the network.
+    Raises KeyError if the year is not in the table or the cache; callers that want
+    to fall back to latest_limit_year() must say so to the user.
+    """
+    return get_limits(year)["elective_deferral"]
+
+
+def fetch_limits_page():
+    """Download Fidelity's 401(k) limits page."""
+    import requests  # only needed for an explicit refresh
+
+    resp = requests.get(LIMITS_URL, timeout=10)
+    resp.raise_for_status()
+    return resp.text
+
+
+def scrape_elective_deferral_limit(text, year):
+    """
+    Find a year's elective deferral limit in the limits page text, or None.
+    Looks for text like 'For 2025, the most you can contribute ... is $23,500'.
+    """
+    match = re.search(rf"For {year}.*?\$([0-9,]+)", text, re.IGNORECASE | re.DOTALL)
+    return int(match.group(1).replace(",", "")) if match else None
+
+
+def refresh_limits(years=None):
+    """
+    Fetch limits for the current and next year and store any new ones in the cache.
+    Years the shipped table covers keep the table's values (see load_limits). Returns {year: elective_deferral} for the years that were found.
+    """
+    if is_offline():
+        raise RuntimeError("Offline mode is on (K401_OFFLINE); not refreshing 401(k) limits")
+
+    current_year = date.today().year
+    years = years or [current_year, current_year + 1]
+    cache = _read_json(CACHE_FILE)
+    cached_limits = cache.get("limits", {})
+    shipped = load_limits()
+    text = fetch_limits_page()
+
+    found = {}
+    for year in years:
+        amount = scrape_elective_deferral_limit(text, year)
+        if amount is None:
+            continue
+        found[year] = amount
+        # Keep catch-up/415(c) values from the latest known year until the table is updated
+        base = dict(shipped.get(year) or shipped[max(shipped)])
+        base.update(cached_limits.get(str(year), {}))
+        base["elective_deferral"] = amount
+        cached_limits[str(year)] = base
+
+    cache = {"fetched_at": datetime.now().isoformat(timespec="seconds"), "limits": cached_limits}
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    tmp_file = f"{CACHE_FILE}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, CACHE_FILE)
+
+    load_limits(reload=True)
+    return found
+
+
+def refresh_in_background(max_age=REFRESH_MAX_AGE):
+    """
+    Stale-while-revalidate: if the cache is older than max_age, refresh it on a daemon
+    thread and return immediately. Callers keep using the last known limits meanwhile.
+    Returns the started thread, or None if no refresh was needed or one is running.
+    """
+    global _last_refresh_attempt
+    if is_offline():
+        return None
+    now = datetime.now()
+    updated_at = cache_updated_at()
+    if updated_at and now - updated_at < max_age:
+        return None
+    if _last_refresh_attempt and now - _last_refresh_attempt < REFRESH_RETRY_INTERVAL:
+        return None
+    if not _refresh_lock.acquire(blocking=False):
+        return None
+    _last_refresh_attempt = now
+
+    def run():
+        try:
+            refresh_limits()
+        except Exception as e:
+            print("Error refreshing 401k limits:", e)
+        finally:
+            _refresh_lock.release()
+
+    thread = threading.Thread(target=run, name="k401-limits-refresh", daemon=True)
+    thread.start()
+    return thread
+
+
+def get_params():
+    parser = ArgumentParser(prog='contribution_limits.py', description='Show or refresh the 401(k) contribution limits table')
+    parser.add_argument("-y", "--year", action="store", type=int, help="Tax year to show (default: current year)")
+    parser.add_argument("--refresh", action="store_true", help="Fetch the latest limits and update the on-disk cache")
+    return parser.parse_args(sys.argv[1:])
+
+
+def main():
+    params = get_params()
+    if params.refresh:
+        try:
+            found = refresh_limits([params.year] if params.year else None)
+        except Exception as e:
+            print(f"Error refreshing 401(k) limits: {e}")
+            sys.exit(1)
+        for year, amount in sorted(found.items()):
+            print(f"{year}: ${amount:,}")
+        print(f"Cache updated: {CACHE_FILE}")
+        return
+
+    year = params.year or date.today().year
+    print(f"Limits table version {table_version()}")
+    for name, amount in get_limits(year).items():
+        print(f"{year} {name}: ${amount:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
+from argparse import ArgumentParser
+from bisect import bisect_right
+from calendar import monthrange
 from datetime import date, timedelta
-import requests
-from bs4 import BeautifulSoup
-import re
+from functools import lru_cache
+import sys
+import time
 
 # Static Parameters
-NO_OF_PAY_PERIODS = 26
+PAY_PERIOD_DAYS = 14
 
 def get_date_input(prompt):
     """Get date input from user and return as a datetime.date object."""
@@ -31,72 +34,175 @@ def calculate_percentage(amount_per_period, gross_pay):
     """Calculate the percentage of gross pay to be contributed per pay period."""
     return (amount_per_period / gross_pay) * 100 if gross_pay > 0 else 0
 
-from datetime import date, timedelta
-
-NO_OF_PAY_PERIODS = 26
-
-def second_friday_of_month(year, month):
-    first_day = date(year, month, 1)
-    first_friday = first_day + timedelta(days=(4 - first_day.weekday() + 7) % 7)
-    second_friday = first_friday + timedelta(weeks=1)
-    return second_friday
-
-def calculate_pay_periods_old(start_date, num_periods):
-    return [start_date + timedelta(weeks=2 * i) for i in range(num_periods)]
-
 def calculate_pay_periods(start_date):
     """
     Generate pay periods (biweekly) starting from start_date until the end of the year.
     Returns a list of datetime.date objects.
     """
-    pay_dates = []
-    current_date = start_date
+    return list(iter_pay_dates(start_date))
+
+def iter_pay_dates(start_date, after=None, step_days=PAY_PERIOD_DAYS):
+    """
+    Lazily yield pay dates every step_days (biweekly by default) from start_date until
+    the end of the year. If `after` is given, only dates strictly after it are yielded.
+    """
+    current_date = nth_pay_date_after(start_date, after, 1, step_days) if after is not None else start_date
     year_end = date(start_date.year, 12, 31)
+    step = timedelta(days=step_days)
 
-    while current_date <= year_end:
-        pay_dates.append(current_date)
-        current_date += timedelta(weeks=2)
+    while current_date and current_date <= year_end:
+        yield current_date
+        current_date += step
 
-    return pay_dates
+def _first_pay_index_after(start_date, after, step_days=PAY_PERIOD_DAYS):
+    """Index of the first pay date (counting from start_date) strictly after `after`."""
+    return 0 if after < start_date else (after - start_date).days // step_days + 1
 
-def calculate_amount_per_period(remaining_amount, periods_left):
-    return remaining_amount / periods_left if periods_left > 0 else 0
+def count_pay_dates_after(start_date, after, step_days=PAY_PERIOD_DAYS):
+    """Count the pay dates every step_days between start_date and Dec 31 that fall strictly after `after`."""
+    total = (date(start_date.year, 12, 31) - start_date).days // step_days + 1
+    return max(total - _first_pay_index_after(start_date, after, step_days), 0)
 
-def calculate_percentage(amount_per_period, gross_pay):
-    return (amount_per_period / gross_pay) * 100 if gross_pay > 0 else 0
+def nth_pay_date_after(start_date, after, n, step_days=PAY_PERIOD_DAYS):
+    """
+    Return the nth (1-based) pay date every step_days strictly after `after`,
+    or None if the year runs out of pay dates first.
+    """
+    if n < 1 or n > count_pay_dates_after(start_date, after, step_days):
+        return None
+    index = _first_pay_index_after(start_date, after, step_days) + n - 1
+    return start_date + timedelta(days=step_days * index)
+
+# Pay frequencies and the number of pay dates they produce in a full year
+PAY_FREQUENCIES = {
+    "weekly": 52,
+    "biweekly": 26,
+    "semimonthly": 24,
+    "monthly": 12,
+}
+
+# Anchor rules map (year, month) to the pay dates a rule places in that month.
+# Weekly/biweekly calendars only use the first one and step forward from it.
+STEP_DAYS = {"weekly": 7, "biweekly": PAY_PERIOD_DAYS}
+ANCHOR_RULES = {
+    "first_friday": lambda year, month: (second_friday_of_month(year, month) - timedelta(weeks=1),),
+    "second_friday": lambda year, month: (second_friday_of_month(year, month),),
+    "first_day": lambda year, month: (date(year, month, 1),),
+    "fifteenth": lambda year, month: (date(year, month, 15),),
+    "last_day": lambda year, month: (date(year, month, monthrange(year, month)[1]),),
+    "first_and_fifteenth": lambda year, month: (date(year, month, 1), date(year, month, 15)),
+    "fifteenth_and_last_day": lambda year, month: (date(year, month, 15),
+                                                   date(year, month, monthrange(year, month)[1])),
+}
+
+DEFAULT_ANCHORS = {
+    "weekly": "first_friday",
+    "biweekly": "second_friday",
+    "semimonthly": "fifteenth_and_last_day",
+    "monthly": "last_day",
+}
+
+# Number of distinct calendars kept in memory by get_pay_calendar
+PAY_CALENDAR_CACHE_SIZE = 1024
+
+class PayCalendar:
+    """
+    Pay dates for one (frequency, anchor rule, year) schedule, starting at start_month.
+    Instances are immutable and shared between employees through get_pay_calendar.
+    Weekly and biweekly schedules answer lookups with the closed-form step arithmetic;
+    month-anchored ones bisect their pay dates.
+    """
 
-def calculate_401k_contribution(year, month, gross_pay_biweekly,
-                                contributions_so_far, annual_limit,
-                                effective_periods=0):
+    __slots__ = ("frequency", "anchor", "year", "start_month", "step_days", "pay_dates")
+
+    def __init__(self, frequency, anchor, year, start_month=1):
+        if frequency not in PAY_FREQUENCIES:
+            raise ValueError(f"Unknown pay frequency: {frequency}")
+        if anchor not in ANCHOR_RULES:
+            raise ValueError(f"Unknown anchor rule: {anchor}")
+        self.frequency = frequency
+        self.anchor = anchor
+        self.year = year
+        self.start_month = start_month
+        self.step_days = STEP_DAYS.get(frequency)
+        self.pay_dates = tuple(self._build_pay_dates())
+
+    def _build_pay_dates(self):
+        rule = ANCHOR_RULES[self.anchor]
+        if self.step_days:
+            yield from iter_pay_dates(rule(self.year, self.start_month)[0], step_days=self.step_days)
+            return
+
+        per_month = 2 if self.frequency == "semimonthly" else 1
+        for month in range(self.start_month, 13):
+            month_dates = rule(self.year, month)
+            if len(month_dates) != per_month:
+                raise ValueError(f"Anchor rule {self.anchor} does not fit a {self.frequency} schedule")
+            yield from month_dates
+
+    @property
+    def periods_per_year(self):
+        return PAY_FREQUENCIES[self.frequency]
+
+    def __len__(self):
+        return len(self.pay_dates)
+
+    def __repr__(self):
+        return (f"PayCalendar({self.frequency!r}, {self.anchor!r}, {self.year}, "
+                f"start_month={self.start_month})")
+
+    def count_after(self, after):
+        """Count the pay dates that fall strictly after `after`."""
+        if self.step_days:
+            return count_pay_dates_after(self.pay_dates[0], after, self.step_days)
+        return len(self.pay_dates) - bisect_right(self.pay_dates, after)
+
+    def nth_after(self, after, n):
+        """Return the nth (1-based) pay date strictly after `after`, or None."""
+        if self.step_days:
+            return nth_pay_date_after(self.pay_dates[0], after, n, self.step_days)
+        index = bisect_right(self.pay_dates, after) + n - 1
+        if n < 1 or index >= len(self.pay_dates):
+            return None
+        return self.pay_dates[index]
+
+    def iter_after(self, after):
+        """Lazily yield the pay dates strictly after `after`."""
+        for index in range(bisect_right(self.pay_dates, after), len(self.pay_dates)):
+            yield self.pay_dates[index]
+
+def get_pay_calendar(frequency, anchor, year, start_month=1):
+    """
+    Return the shared PayCalendar for a schedule, building it on first use.
+    An anchor of None picks the frequency's default from DEFAULT_ANCHORS.
+    """
+    return _cached_pay_calendar(frequency, anchor or DEFAULT_ANCHORS.get(frequency), year, start_month)
 
-    start_date = second_friday_of_month(year, month)
-    remaining_amount_for_401k = annual_limit - contributions_so_far
-    
-    # Generate pay periods
-    #pay_dates = calculate_pay_periods(start_date, NO_OF_PAY_PERIODS)
-    pay_dates = calculate_pay_periods(start_date)
+@lru_cache(maxsize=PAY_CALENDAR_CACHE_SIZE)
+def _cached_pay_calendar(frequency, anchor, year, start_month):
+    return PayCalendar(frequency, anchor, year, start_month)
 
+def contribution_core(year, month, gross_pay_biweekly, contributions_so_far,
+                      annual_limit, effective_periods, as_of,
+                      frequency="biweekly", anchor=None):
+    """
+    Pure contribution calculation for a fixed as-of date: no prints, no clock reads.
+    `effective_periods` in the result is the value actually used, clamped to the
+    number of pay periods left after as_of.
+    """
+    pay_calendar = get_pay_calendar(frequency, anchor, year, month)
     
     # Calculate remaining pay periods
-    today = date.today()
-    future_pay_periods = [d for d in pay_dates if d > today]
-    
-    if effective_periods > len(future_pay_periods):
-        print("Effective periods exceed the number of remaining pay periods. Adjusting to remaining periods.")
-        effective_periods = len(future_pay_periods)
+    no_of_future_pay_periods = pay_calendar.count_after(as_of)
+    effective_periods = min(effective_periods, no_of_future_pay_periods)
     
     if effective_periods > 0:
-        # Adjust future pay periods based on effective_periods
-        next_pay_period = future_pay_periods[effective_periods - 1] if len(future_pay_periods) >= effective_periods else today
-        future_pay_periods = [d for d in pay_dates if d >= next_pay_period]
-        no_of_pay_periods_left = len(future_pay_periods)
+        # Pay periods before the change takes effect are dropped
+        no_of_pay_periods_left = no_of_future_pay_periods - (effective_periods - 1)
     else:
         # Immediate effect
-        no_of_pay_periods_left = len(future_pay_periods)
+        no_of_pay_periods_left = no_of_future_pay_periods
     
-    amount_per_pay_period = calculate_amount_per_period(remaining_amount_for_401k, no_of_pay_periods_left)
-    percentage_per_pay_period = calculate_percentage(amount_per_pay_period, gross_pay_biweekly)
-
     remaining_amount_for_401k = max(0.0, annual_limit - contributions_so_far)
     amount_per_pay_period = calculate_amount_per_period(remaining_amount_for_401k, no_of_pay_periods_left)
     percentage_per_pay_period = calculate_percentage(amount_per_pay_period, gross_pay_biweekly)
@@ -107,53 +213,84 @@ def calculate_401k_contribution(year, month, gross_pay_biweekly,
         "periods_left": no_of_pay_periods_left,
         "amount_per_period": amount_per_pay_period,
         "percent_per_period": percentage_per_pay_period,
-        "first_future_pay_date": future_pay_periods[0] if future_pay_periods else None,
-        "future_pay_periods": future_pay_periods,
-        "all_pay_dates": pay_dates,
-
+        "first_future_pay_date": pay_calendar.nth_after(as_of, max(effective_periods, 1)),
+        "effective_periods": effective_periods,
+        "as_of": as_of,
     }
 
+# Number of distinct scenarios remembered by calculate_401k_contribution
+CONTRIBUTION_CACHE_SIZE = 4096
 
-def fetch_latest_401k_limit():
+_memoized_contribution_core = lru_cache(maxsize=CONTRIBUTION_CACHE_SIZE)(contribution_core)
+
+def calculate_401k_contribution(year, month, gross_pay_biweekly,
+                                contributions_so_far, annual_limit,
+                                effective_periods=0, frequency="biweekly",
+                                anchor=None, as_of=None):
     """
-    Fetch the most recent 401(k) contribution limit from Fidelity's page.
-    It searches for the current year in the text and extracts the corresponding dollar value.
+    Calculate the per-period contribution needed to reach annual_limit.
+    `as_of` defaults to today; repeated scenarios are served from a memoized core.
     """
-    try:
-        url = "https://www.fidelity.com/learning-center/smart-money/401k-contribution-limits"
-        resp = requests.get(url, timeout=10)
-        text = resp.text
+    as_of = as_of or date.today()
+    result = dict(_memoized_contribution_core(year, month, gross_pay_biweekly,
+                                              contributions_so_far, annual_limit,
+                                              effective_periods, as_of, frequency, anchor))
+    
+    if result["effective_periods"] < effective_periods:
+        print("Effective periods exceed the number of remaining pay periods. Adjusting to remaining periods.")
+    
+    return result
 
-        # Determine which year's limit to look for (current or next)
-        current_year = date.today().year
 
-        # Regex pattern to find something like:
-        # 'For 2025, the most you can contribute ... is $23,500'
-        pattern = rf"For {current_year}.*?\$([0-9,]+)"
-        match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
+def fetch_latest_401k_limit():
+    """
+    Return the current year's 401(k) contribution limit from the local limits table,
+    raising KeyError if that year is not known yet. No network access; run `python contribution_limits.py --refresh` to update the cache.
+    """
+    from contribution_limits import get_401k_limit
 
-        if not match:
-            # Fallback: try next year if IRS already published it
-            next_year = current_year + 1
-            pattern = rf"For {next_year}.*?\$([0-9,]+)"
-            match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
+    return get_401k_limit()
 
-        if match:
-            return int(match.group(1).replace(",", ""))
 
-    except Exception as e:
-        print("Error fetching 401k limit:", e)
+def get_params():
+    parser = ArgumentParser(prog='k401.py', description='Calculate the percentage per paycheck to meet your full 401(k) limit')
+    parser.add_argument("-b", "--batch", action="store", help="Scenario file (CSV or JSONL, '-' for stdin); runs non-interactively")
+    parser.add_argument("-o", "--output", action="store", default="-", help="JSONL results file for --batch (default: stdout)")
+    parser.add_argument("-w", "--workers", action="store", type=int, default=1, help="Worker processes for --batch")
+    parser.add_argument("--chunk-size", action="store", type=int, default=10_000, help="Scenarios per worker task")
+    parser.add_argument("--as-of", action="store", type=date.fromisoformat, help="Calculate as of this date (YYYY-MM-DD) instead of today")
+    parser.add_argument("--frequency", action="store", choices=list(PAY_FREQUENCIES), default="biweekly", help="Pay frequency for rows without one")
+    return parser.parse_args(sys.argv[1:])
 
-    # fallback default if all else fails
-    return 23500
+def run_batch_mode(params):
+    """Stream --batch scenarios through the batch engine and report throughput on stderr."""
+    from k401_batch import run_batch  # needs numpy; the interactive mode does not
 
+    input_stream = sys.stdin if params.batch == "-" else open(params.batch, newline="", encoding="utf-8")
+    output_stream = sys.stdout if params.output == "-" else open(params.output, "w", encoding="utf-8")
+    start = time.perf_counter()
+    try:
+        rows = run_batch(input_stream, output_stream, params.workers, params.chunk_size,
+                         params.as_of, params.frequency)
+    except ValueError as e:
+        print(f"Invalid scenario: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        for stream in (input_stream, output_stream):
+            if stream not in (sys.stdin, sys.stdout):
+                stream.close()
+    elapsed = time.perf_counter() - start
+    print(f"Processed {rows} scenarios in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:,.0f} rows/s)", file=sys.stderr)
 
 def main():
+    params = get_params()
+    if params.batch:
+        run_batch_mode(params)
+        return
 
     # Input
     year = int(input("Enter the year for the first pay period: "))
     month = int(input("Enter the month for the first pay period: "))
-    start_date = second_friday_of_month(year, month)
     
     gross_pay_biweekly = float(input('Bi-weekly Gross Pay: '))
     contributions_so_far = float(input('Total Contribution so far: '))
@@ -163,31 +300,13 @@ def main():
     
     effective_periods = int(input('In how many pay periods should the change be effective? '))
     
-    remaining_amount_for_401k = annual_limit - contributions_so_far
-    
-    # Generate pay periods
-    #pay_dates = calculate_pay_periods(start_date, NO_OF_PAY_PERIODS)
-    pay_dates = calculate_pay_periods(start_date)
-    
-    # Calculate remaining pay periods
-    today = date.today()
-    future_pay_periods = [d for d in pay_dates if d > today]
-    
-    if effective_periods > len(future_pay_periods):
-        print("Effective periods exceed the number of remaining pay periods. Adjusting to remaining periods.")
-        effective_periods = len(future_pay_periods)
-    
-    if effective_periods > 0:
-        # Adjust future pay periods based on effective_periods
-        next_pay_period = future_pay_periods[effective_periods - 1] if len(future_pay_periods) >= effective_periods else today
-        future_pay_periods = [d for d in pay_dates if d >= next_pay_period]
-        no_of_pay_periods_left = len(future_pay_periods)
-    else:
-        # Immediate effect
-        no_of_pay_periods_left = len(future_pay_periods)
-    
-    amount_per_pay_period = calculate_amount_per_period(remaining_amount_for_401k, no_of_pay_periods_left)
-    percentage_per_pay_period = calculate_percentage(amount_per_pay_period, gross_pay_biweekly)
+    result = calculate_401k_contribution(year, month, gross_pay_biweekly,
+                                         contributions_so_far, annual_limit,
+                                         effective_periods)
+    remaining_amount_for_401k = result["remaining_amount"]
+    no_of_pay_periods_left = result["periods_left"]
+    amount_per_pay_period = result["amount_per_period"]
+    percentage_per_pay_period = result["percent_per_period"]
     
     # Output
     print(f'Annual contribution limit: ${annual_limit:.2f}')
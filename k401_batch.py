@@ -0,0 +1,221 @@
+import collections
+import csv
+import functools
+import itertools
+import json
+import multiprocessing
+from datetime import date
+
+import numpy as np
+
+from k401 import get_pay_calendar
+
+
+def pay_periods_left_batch(years, months, effective_periods=0, as_of=None,
+                           frequency="biweekly", anchor=None):
+    """
+    Count the pay periods left for each row, as calculate_401k_contribution does.
+    `frequency` is one name for every row or an array of per-row names.
+    Rows on the same (frequency, year, start month) share one PayCalendar lookup.
+    Raises ValueError naming the first row whose month is not 1-12.
+    """
+    today = as_of or date.today()
+    frequencies = np.asarray(frequency)
+    if frequencies.ndim == 0:
+        names, codes = [str(frequency)], 0
+    else:
+        names, codes = np.unique(frequencies, return_inverse=True)
+        codes = codes.reshape(frequencies.shape)
+
+    codes, years, months = np.broadcast_arrays(np.asarray(codes, dtype=np.int64),
+                                               np.asarray(years, dtype=np.int64),
+                                               np.asarray(months, dtype=np.int64))
+    invalid = np.flatnonzero((months < 1) | (months > 12))
+    if invalid.size:
+        row = int(invalid[0])
+        raise ValueError(f"Row {row}: month must be between 1 and 12, got {months.flat[row]}")
+
+    # One key per distinct (frequency, year, month), so each calendar is looked up once.
+    # The columns are packed into one integer, offset from the first year: np.unique over
+    # rows (axis=0) sorts far slower
+    first_year = int(years.min()) if years.size else 0
+    year_span = int(years.max()) - first_year + 1 if years.size else 1
+    keys = (codes.ravel() * year_span + years.ravel() - first_year) * 12 + months.ravel() - 1
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+
+    future_by_key = np.array([
+        get_pay_calendar(str(names[key // 12 // year_span]), anchor,
+                         first_year + key // 12 % year_span, key % 12 + 1).count_after(today)
+        for key in unique_keys.tolist()
+    ], dtype=np.int64)
+    future_periods = future_by_key[inverse.reshape(-1)].reshape(months.shape)
+
+    # Clamp effective periods to what is left, then drop the periods before it takes effect
+    effective = np.minimum(np.asarray(effective_periods, dtype=np.int64), future_periods)
+    return future_periods - np.maximum(effective - 1, 0)
+
+
+def calculate_401k_contribution_batch(years, months, gross_pay_biweekly,
+                                      contributions_so_far, annual_limit,
+                                      effective_periods=0, as_of=None,
+                                      frequency="biweekly", anchor=None):
+    """
+    Vectorized calculate_401k_contribution over column arrays.
+    Returns a dict of numpy arrays: remaining_amount, periods_left,
+    amount_per_period and percent_per_period.
+    """
+    gross_pay = np.asarray(gross_pay_biweekly, dtype=np.float64)
+    contributions = np.asarray(contributions_so_far, dtype=np.float64)
+    limit = np.asarray(annual_limit, dtype=np.float64)
+
+    periods_left = pay_periods_left_batch(years, months, effective_periods, as_of,
+                                          frequency, anchor)
+    remaining_amount = np.maximum(0.0, limit - contributions)
+
+    amount_per_period = np.divide(
+        remaining_amount, periods_left,
+        out=np.zeros(np.broadcast(remaining_amount, periods_left).shape),
+        where=periods_left > 0,
+    )
+    percent_per_period = np.divide(
+        amount_per_period, gross_pay,
+        out=np.zeros(np.broadcast(amount_per_period, gross_pay).shape),
+        where=gross_pay > 0,
+    ) * 100
+
+    return {
+        "remaining_amount": remaining_amount,
+        "periods_left": periods_left,
+        "amount_per_period": amount_per_period,
+        "percent_per_period": percent_per_period,
+    }
+
+
+
+# Columns a batch scenario must have; the rest are optional
+REQUIRED_COLUMNS = ("year", "month", "gross_pay", "contributions_so_far")
+RESULT_COLUMNS = ("remaining_amount", "periods_left", "amount_per_period", "percent_per_period")
+BATCH_CHUNK_SIZE = 10_000
+
+
+def _iter_scenarios(stream):
+    """Yield scenario dicts from a CSV or JSONL stream; JSONL is detected from the first line."""
+    first_line = stream.readline()
+    if not first_line:
+        return
+    if first_line.lstrip().startswith("{"):
+        for line in itertools.chain([first_line], stream):
+            if line.strip():
+                yield json.loads(line)
+        return
+    yield from csv.DictReader(itertools.chain([first_line], stream))
+
+
+def _iter_chunks(rows, chunk_size):
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _with_offsets(chunks):
+    """Pair each chunk with the index of its first row in the whole input."""
+    row_offset = 0
+    for chunk in chunks:
+        yield row_offset, chunk
+        row_offset += len(chunk)
+
+
+def process_scenarios(rows, as_of=None, frequency="biweekly", anchor=None, row_offset=0):
+    """
+    Run one chunk of scenario dicts through the batch engine.
+    annual_limit defaults to the year's limit, effective_periods to 0 and the
+    per-row frequency to `frequency`. Returns the rows with result fields added.
+    Raises ValueError naming the row (counting from row_offset) for a row that is not
+    a dict, lacks a required field, has a month outside 1-12 or a year without limits.
+    """
+    for index, row in enumerate(rows, row_offset):
+        if not isinstance(row, dict):
+            raise ValueError(f"Row {index}: expected an object of scenario fields, got {type(row).__name__}")
+        missing = [name for name in REQUIRED_COLUMNS if row.get(name) in (None, "")]
+        if missing:
+            raise ValueError(f"Row {index}: missing fields: {', '.join(missing)}")
+
+    def column(name, default=None, dtype=np.float64):
+        values = (row.get(name) for row in rows)
+        return np.array([default if value in (None, "") else value for value in values], dtype=dtype)
+
+    years = column("year", dtype=np.int64)
+    months = column("month", dtype=np.int64)
+    # Checked here too so the message counts rows across chunks
+    invalid = np.flatnonzero((months < 1) | (months > 12))
+    if invalid.size:
+        index = int(invalid[0])
+        raise ValueError(f"Row {row_offset + index}: month must be between 1 and 12, got {months[index]}")
+
+    limits = column("annual_limit", 0.0)
+    if not limits.all():
+        # Fill in missing limits from the local limits table, one lookup per year
+        from contribution_limits import get_401k_limit
+        for year in np.unique(years[limits == 0]):
+            rows_for_year = (years == year) & (limits == 0)
+            try:
+                limits[rows_for_year] = get_401k_limit(int(year))
+            except KeyError:
+                index = row_offset + int(np.flatnonzero(rows_for_year)[0])
+                raise ValueError(f"Row {index}: no 401(k) limits known for {year}; give an annual_limit") from None
+
+    result = calculate_401k_contribution_batch(
+        years,
+        months,
+        column("gross_pay"),
+        column("contributions_so_far"),
+        limits,
+        column("effective_periods", 0, np.int64),
+        as_of=as_of,
+        frequency=column("frequency", frequency, object),
+        anchor=anchor,
+    )
+    columns = {name: result[name].tolist() for name in RESULT_COLUMNS}
+    columns["annual_limit"] = limits.tolist()
+    return [dict(row, **{name: values[i] for name, values in columns.items()})
+            for i, row in enumerate(rows)]
+
+
+def _process_chunk_to_jsonl(rows, **kwargs):
+    # Serialize in the worker so the parent process only copies bytes to the output
+    results = process_scenarios(rows, **kwargs)
+    return len(results), "".join(json.dumps(row) + "\n" for row in results)
+
+
+def run_batch(input_stream, output_stream, workers=1, chunk_size=BATCH_CHUNK_SIZE,
+              as_of=None, frequency="biweekly", anchor=None):
+    """
+    Stream scenarios from input_stream and write JSONL results to output_stream as
+    chunks finish, in input order. With workers > 1 chunks fan out across a process
+    pool, keeping at most two chunks per worker in flight. Returns the row count.
+    """
+    as_of = as_of or date.today()
+    chunks = _iter_chunks(_iter_scenarios(input_stream), chunk_size)
+    process = functools.partial(_process_chunk_to_jsonl, as_of=as_of, frequency=frequency, anchor=anchor)
+
+    def write(result):
+        rows, text = result
+        output_stream.write(text)
+        return rows
+
+    if workers <= 1:
+        return sum(write(process(chunk, row_offset=row_offset)) for row_offset, chunk in _with_offsets(chunks))
+
+    rows_written = 0
+    with multiprocessing.Pool(workers) as pool:
+        pending = collections.deque()
+        for row_offset, chunk in _with_offsets(chunks):
+            pending.append(pool.apply_async(process, (chunk,), {"row_offset": row_offset}))
+            if len(pending) >= 2 * workers:
+                rows_written += write(pending.popleft().get())
+        while pending:
+            rows_written += write(pending.popleft().get())
+    return rows_written
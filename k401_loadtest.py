@@ -0,0 +1,95 @@
+import asyncio
+import random
+import statistics
+import sys
+import time
+from argparse import ArgumentParser
+
+import aiohttp
+
+
+def get_params():
+    parser = ArgumentParser(prog='k401_loadtest.py', description='Load test a running k401_service.py and report latency and throughput')
+    parser.add_argument("--url", action="store", default="http://127.0.0.1:8401")
+    parser.add_argument("-n", "--requests", action="store", type=int, default=2000, help="Total requests to send")
+    parser.add_argument("-c", "--concurrency", action="store", type=int, default=32, help="Requests in flight at once")
+    parser.add_argument("-b", "--batch-size", action="store", type=int, default=0, help="Scenarios per request; 0 hits the single-scenario endpoint")
+    parser.add_argument("--seed", action="store", type=int, default=401)
+    return parser.parse_args(sys.argv[1:])
+
+
+def random_scenario(rng):
+    return {
+        "year": 2025,
+        "month": rng.randint(1, 12),
+        "gross_pay": round(rng.uniform(1000, 10000), 2),
+        "contributions_so_far": round(rng.uniform(0, 20000), 2),
+        "annual_limit": 23500,
+        "effective_periods": rng.randint(0, 3),
+        "frequency": rng.choice(["weekly", "biweekly", "semimonthly", "monthly"]),
+    }
+
+
+def percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_load_test(url, total_requests, concurrency, batch_size, seed):
+    rng = random.Random(seed)
+    if batch_size:
+        endpoint = f"{url}/contributions/batch"
+        payloads = [{"scenarios": [random_scenario(rng) for _ in range(batch_size)]} for _ in range(min(total_requests, 16))]
+    else:
+        endpoint = f"{url}/contribution"
+        payloads = [random_scenario(rng) for _ in range(min(total_requests, 1024))]
+
+    latencies = []
+    failures = 0
+    next_request = 0
+
+    async def worker(session):
+        nonlocal next_request, failures
+        while next_request < total_requests:
+            payload = payloads[next_request % len(payloads)]
+            next_request += 1
+            start = time.perf_counter()
+            try:
+                async with session.post(endpoint, json=payload) as resp:
+                    await resp.read()
+                    if resp.status != 200:
+                        failures += 1
+                        continue
+            except aiohttp.ClientError:
+                failures += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return latencies, failures, elapsed
+
+
+def main():
+    params = get_params()
+    latencies, failures, elapsed = asyncio.run(run_load_test(
+        params.url.rstrip("/"), params.requests, params.concurrency, params.batch_size, params.seed))
+    if not latencies:
+        print(f"All {failures} requests failed; is k401_service.py running at {params.url}?")
+        sys.exit(1)
+
+    latencies.sort()
+    scenarios = len(latencies) * max(params.batch_size, 1)
+    print(f"Requests:    {len(latencies)} ok, {failures} failed in {elapsed:.2f}s")
+    print(f"Throughput:  {len(latencies) / elapsed:,.0f} requests/s, {scenarios / elapsed:,.0f} scenarios/s")
+    print(f"Latency p50: {percentile(latencies, 50) * 1000:.2f} ms")
+    print(f"Latency p99: {percentile(latencies, 99) * 1000:.2f} ms")
+    print(f"Latency avg: {statistics.fmean(latencies) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
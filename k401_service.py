@@ -0,0 +1,117 @@
+import asyncio
+import sys
+from argparse import ArgumentParser
+from datetime import date
+
+from aiohttp import web
+
+from contribution_limits import get_401k_limit
+from k401 import PAY_FREQUENCIES, _memoized_contribution_core
+from k401_batch import process_scenarios
+
+# Largest bulk request accepted, in scenarios
+MAX_BATCH_SCENARIOS = 100_000
+
+
+def get_params():
+    parser = ArgumentParser(prog='k401_service.py', description='HTTP service for the 401(k) contribution calculator')
+    parser.add_argument("--host", action="store", default="127.0.0.1")
+    parser.add_argument("-p", "--port", action="store", type=int, default=8401)
+    return parser.parse_args(sys.argv[1:])
+
+
+def _json_error(status, message):
+    return web.json_response({"error": message}, status=status)
+
+
+def _parse_as_of(value):
+    return date.fromisoformat(value) if value else None
+
+
+def _serialize(result):
+    return {key: value.isoformat() if isinstance(value, date) else value for key, value in result.items()}
+
+
+async def health(request):
+    return web.json_response({"status": "ok"})
+
+
+async def contribution(request):
+    """
+    POST /contribution: one scenario in, one calculate_401k_contribution result out.
+    effective_periods_clamped is true when effective_periods was cut to the periods left.
+    """
+    try:
+        scenario = await request.json()
+        if not isinstance(scenario, dict):
+            raise ValueError("Expected an object of scenario fields")
+        year = int(scenario["year"])
+        frequency = scenario.get("frequency") or "biweekly"
+        if frequency not in PAY_FREQUENCIES:
+            raise ValueError(f"Unknown pay frequency: {frequency}")
+        annual_limit = scenario.get("annual_limit")
+        if annual_limit is None:
+            try:
+                annual_limit = get_401k_limit(year)
+            except KeyError:
+                return _json_error(400, f"Unsupported year {year}: no 401(k) limits known; give an annual_limit")
+        effective_periods = int(scenario.get("effective_periods") or 0)
+        # The memoized core, not the calculate_401k_contribution wrapper, which prints the clamp
+        result = dict(_memoized_contribution_core(
+            year,
+            int(scenario["month"]),
+            float(scenario["gross_pay"]),
+            float(scenario["contributions_so_far"]),
+            float(annual_limit),
+            effective_periods,
+            _parse_as_of(scenario.get("as_of")) or date.today(),
+            frequency,
+        ))
+        result["effective_periods_clamped"] = result["effective_periods"] < effective_periods
+    except KeyError as e:
+        return _json_error(400, f"Missing field: {e.args[0]}")
+    except (TypeError, ValueError) as e:
+        return _json_error(400, str(e))
+    return web.json_response(_serialize(result))
+
+
+async def contribution_batch(request):
+    """
+    POST /contributions/batch: {"scenarios": [...], "as_of": "YYYY-MM-DD"} in,
+    {"results": [...]} out, computed in one vectorized pass off the event loop.
+    """
+    try:
+        body = await request.json()
+        scenarios = body.get("scenarios") if isinstance(body, dict) else body
+        if not isinstance(scenarios, list):
+            raise ValueError("Expected a list of scenarios")
+        if len(scenarios) > MAX_BATCH_SCENARIOS:
+            return _json_error(413, f"At most {MAX_BATCH_SCENARIOS} scenarios per request")
+        if not scenarios:
+            return web.json_response({"results": []})
+        as_of = _parse_as_of(body.get("as_of")) if isinstance(body, dict) else None
+
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(None, process_scenarios, scenarios, as_of)
+    except (KeyError, TypeError, ValueError) as e:
+        return _json_error(400, str(e))
+    return web.json_response({"results": results})
+
+
+def create_app():
+    app = web.Application(client_max_size=64 * 1024 ** 2)
+    app.add_routes([
+        web.get("/health", health),
+        web.post("/contribution", contribution),
+        web.post("/contributions/batch", contribution_batch),
+    ])
+    return app
+
+
+def main():
+    params = get_params()
+    web.run_app(create_app(), host=params.host, port=params.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import numpy as np
+
+# Plan rules: percent elections move in whole-percent steps, capped per paycheck
+PERCENT_STEP = 1.0
+MAX_PERCENT = 100.0
+
+# Slack for amounts that land a hair under a whole step because of float rounding
+_EPSILON = 1e-9
+
+
+def optimize_contribution_schedule(remaining_amount, periods_left, gross_pay,
+                                   match_rate=0.0, match_cap_percent=0.0,
+                                   max_percent=MAX_PERCENT, percent_step=PERCENT_STEP):
+    """
+    Per-paycheck percentages that hit the limit while keeping every dollar of employer match.
+    The match is match_rate of deferrals up to match_cap_percent of each paycheck, with no
+    true-up, so deferring below the cap in any paycheck loses match for good.
+
+    Elections are multiples of percent_step (1.0 for whole percents) no higher than max_percent,
+    and never push total deferrals past remaining_amount. The optimum is as even as the step
+    allows: high_periods paychecks at high_percent first, then the rest at low_percent.
+    All arguments broadcast; returns a dict of numpy arrays.
+    """
+    remaining = np.maximum(np.asarray(remaining_amount, dtype=np.float64), 0.0)
+    periods = np.maximum(np.asarray(periods_left, dtype=np.int64), 0)
+    gross = np.asarray(gross_pay, dtype=np.float64)
+    match_rate = np.asarray(match_rate, dtype=np.float64)
+    match_cap = np.asarray(match_cap_percent, dtype=np.float64)
+    step = np.asarray(percent_step, dtype=np.float64)
+
+    # Dollars one step of election defers from one paycheck
+    step_amount = gross * step / 100
+    has_pay = (periods > 0) & (step_amount > 0)
+    safe_step_amount = np.where(has_pay, step_amount, 1.0)
+    safe_periods = np.where(has_pay, periods, 1)
+
+    # Total steps across all paychecks: as many as fit under the limit and the per-paycheck cap
+    max_steps = np.floor(np.asarray(max_percent, dtype=np.float64) / step + _EPSILON).astype(np.int64)
+    total_steps = np.floor(remaining / safe_step_amount + _EPSILON).astype(np.int64)
+    total_steps = np.where(has_pay, np.minimum(total_steps, max_steps * safe_periods), 0)
+
+    # Spreading evenly maximizes sum(min(percent, cap)) over paychecks
+    low_steps = total_steps // safe_periods
+    high_periods = np.where(has_pay, total_steps - low_steps * safe_periods, 0)
+    low_percent = low_steps * step
+    high_percent = np.where(high_periods > 0, (low_steps + 1) * step, low_percent)
+
+    total_contribution = total_steps * step_amount
+    matched_percent = (high_periods * np.minimum(high_percent, match_cap)
+                       + (periods - high_periods) * np.minimum(low_percent, match_cap))
+    employer_match = np.where(has_pay, match_rate * matched_percent * gross / 100, 0.0)
+
+    return {
+        "periods_left": periods,
+        "high_periods": high_periods,
+        "high_percent": high_percent,
+        "low_percent": low_percent,
+        "total_contribution": total_contribution,
+        "employer_match": employer_match,
+        "max_employer_match": np.where(has_pay, match_rate * match_cap * gross / 100 * periods, 0.0),
+        "shortfall": remaining - total_contribution,
+    }
+
+
+def expand_schedule(schedule, max_periods=None):
+    """
+    Turn optimize_contribution_schedule output into a (employees, max_periods) array of
+    per-paycheck percentages; paychecks past an employee's periods_left are 0.
+    """
+    periods = np.atleast_1d(schedule["periods_left"])
+    high_periods = np.atleast_1d(schedule["high_periods"])
+    max_periods = int(periods.max(initial=0)) if max_periods is None else max_periods
+
+    paycheck = np.arange(max_periods)
+    percents = np.where(paycheck < high_periods.reshape(-1, 1),
+                        np.atleast_1d(schedule["high_percent"]).reshape(-1, 1),
+                        np.atleast_1d(schedule["low_percent"]).reshape(-1, 1))
+    return np.where(paycheck < periods.reshape(-1, 1), percents, 0.0)
@@ -0,0 +1,237 @@
+import csv
+import os
+import sys
+from argparse import ArgumentParser
+from datetime import date
+from itertools import islice
+
+import numpy as np
+
+from contribution_limits import get_401k_limit
+from k401_batch import calculate_401k_contribution_batch
+
+# Rows read per chunk; bounds memory no matter how large the export is
+CHUNK_SIZE = 100_000
+
+# Default column names in the paystub and roster exports
+EMPLOYEE_COLUMN = "employee_id"
+PAY_DATE_COLUMN = "pay_date"
+DEFERRAL_COLUMN = "deferral_amount"
+ROSTER_COLUMNS = ("year", "month", "gross_pay", "effective_periods")
+
+
+def get_params():
+    parser = ArgumentParser(prog='paystub_ledger.py', description='Derive YTD 401(k) deferrals from paystub exports and calculate new contribution percentages')
+    parser.add_argument("ledger", help="Paystub ledger (.csv or .parquet)")
+    parser.add_argument("-r", "--roster", action="store", help="Employee roster CSV; omit to only print YTD totals")
+    parser.add_argument("-y", "--year", action="store", type=int, help="Tax year to aggregate (default: each roster row's year, or this year without a roster)")
+    parser.add_argument("-l", "--limit", action="store", type=float, default=None, help="Annual limit for roster rows without one (default: the year's 401(k) limit)")
+    parser.add_argument("-o", "--output", action="store", default="-", help="Output CSV (default: stdout)")
+    parser.add_argument("--chunk-size", action="store", type=int, default=CHUNK_SIZE)
+    return parser.parse_args(sys.argv[1:])
+
+
+def iter_chunks(path, columns, chunk_size=CHUNK_SIZE):
+    """
+    Stream a CSV or Parquet file as dicts of column lists, chunk_size rows at a time.
+    Only the requested columns are kept.
+    """
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq  # optional; only needed for Parquet exports
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=list(columns)):
+            yield {name: batch.column(name).to_pylist() for name in columns}
+        return
+
+    with open(path, newline="", encoding="utf-8") as csvfile:
+        reader = csv.DictReader(csvfile)
+        missing = [name for name in columns if name not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+        while True:
+            rows = list(islice(reader, chunk_size))
+            if not rows:
+                return
+            yield {name: [row[name] for row in rows] for name in columns}
+
+
+def aggregate_contributions_by_year(ledger_path, years, chunk_size=CHUNK_SIZE,
+                                    employee_column=EMPLOYEE_COLUMN,
+                                    pay_date_column=PAY_DATE_COLUMN,
+                                    deferral_column=DEFERRAL_COLUMN):
+    """
+    Sum deferrals per employee and pay year over a paystub ledger, one chunk at a time.
+    Pay dates are ISO (YYYY-MM-DD) strings or dates; rows paid outside `years` are skipped.
+    Returns a dict of (employee_id, year) -> contributions.
+    """
+    wanted_years = np.fromiter(years, dtype=np.int64)
+    totals = {}
+    for chunk in iter_chunks(ledger_path, (employee_column, pay_date_column, deferral_column), chunk_size):
+        pay_years = np.fromiter((int(str(d)[:4]) for d in chunk[pay_date_column]),
+                                dtype=np.int64, count=len(chunk[pay_date_column]))
+        in_years = np.isin(pay_years, wanted_years)
+        employees = np.asarray(chunk[employee_column]).astype(str)[in_years]
+        amounts = np.asarray(chunk[deferral_column], dtype=np.float64)[in_years]
+        pay_years = pay_years[in_years]
+
+        # Reduce the chunk per (employee, year) before touching the running totals
+        chunk_employees, employee_index = np.unique(employees, return_inverse=True)
+        chunk_years, year_index = np.unique(pay_years, return_inverse=True)
+        keys, inverse = np.unique(employee_index * chunk_years.size + year_index, return_inverse=True)
+        chunk_totals = np.bincount(inverse, weights=amounts, minlength=len(keys))
+        for key, amount in zip(keys.tolist(), chunk_totals.tolist()):
+            employee_year = (str(chunk_employees[key // chunk_years.size]), int(chunk_years[key % chunk_years.size]))
+            totals[employee_year] = totals.get(employee_year, 0.0) + amount
+
+    return totals
+
+
+def aggregate_ytd_contributions(ledger_path, year=None, chunk_size=CHUNK_SIZE, **columns):
+    """
+    Sum deferrals per employee paid in `year` (default: this year) over a paystub ledger.
+    Returns a dict of employee_id -> YTD contributions.
+    """
+    year = year or date.today().year
+    totals = aggregate_contributions_by_year(ledger_path, [year], chunk_size, **columns)
+    return {employee_id: amount for (employee_id, _), amount in totals.items()}
+
+
+def _roster_columns(roster_path):
+    """Column names of a roster CSV or Parquet file."""
+    if roster_path.endswith(".parquet"):
+        import pyarrow.parquet as pq  # optional; only needed for Parquet exports
+
+        return pq.ParquetFile(roster_path).schema_arrow.names
+    with open(roster_path, newline="", encoding="utf-8") as csvfile:
+        return next(csv.reader(csvfile), [])
+
+
+def _roster_arrays(chunk, row_offset, annual_limit=None):
+    """
+    Convert a roster chunk to arrays, filling limits that are missing from annual_limit
+    or the year's 401(k) limit. Raises ValueError naming the first bad row.
+    """
+    def column(name):
+        values = chunk[name]
+        dtype = np.float64 if name == "gross_pay" else np.int64
+        try:
+            return np.asarray(values, dtype=dtype)
+        except (TypeError, ValueError):
+            for index, value in enumerate(values):
+                try:
+                    np.asarray(value, dtype=dtype)
+                except (TypeError, ValueError):
+                    raise ValueError(f"Row {row_offset + index}: invalid {name} {value!r}") from None
+            raise
+
+    arrays = {name: column(name) for name in ROSTER_COLUMNS}
+
+    invalid = np.flatnonzero((arrays["month"] < 1) | (arrays["month"] > 12))
+    if invalid.size:
+        index = int(invalid[0])
+        raise ValueError(f"Row {row_offset + index}: month must be between 1 and 12, got {arrays['month'][index]}")
+
+    limits = np.full(len(arrays["year"]), np.nan)
+    if "annual_limit" in chunk:
+        limits = np.array([np.nan if value in (None, "") else value for value in chunk["annual_limit"]], dtype=np.float64)
+    if annual_limit is not None:
+        limits[np.isnan(limits)] = annual_limit
+    # Fill the rest from the local limits table, one lookup per year
+    for year in np.unique(arrays["year"][np.isnan(limits)]).tolist():
+        rows_for_year = (arrays["year"] == year) & np.isnan(limits)
+        try:
+            limits[rows_for_year] = get_401k_limit(year)
+        except KeyError:
+            index = row_offset + int(np.flatnonzero(rows_for_year)[0])
+            raise ValueError(f"Row {index}: no 401(k) limits known for {year}; give an annual_limit or --limit") from None
+    arrays["annual_limit"] = limits
+    return arrays
+
+
+def calculate_contributions_from_ledger(roster_path, ledger_path, year=None,
+                                        annual_limit=None, as_of=None,
+                                        frequency="biweekly", anchor=None,
+                                        chunk_size=CHUNK_SIZE):
+    """
+    Stream a roster through the batch calculator using YTD totals from the ledger.
+    The roster needs employee_id, year, month, gross_pay and effective_periods columns;
+    an annual_limit column is optional, with missing limits taken from annual_limit or
+    the year's 401(k) limit. YTD totals count the pay dates in `year`, or in each row's
+    own year by default.
+    The roster is checked and the ledger summed before this returns, so bad input raises
+    ValueError here. Returns an iterator of one dict of arrays per chunk.
+    """
+    columns = (EMPLOYEE_COLUMN,) + ROSTER_COLUMNS
+    if "annual_limit" in _roster_columns(roster_path):
+        columns += ("annual_limit",)
+
+    # First pass: check every row, and find the tax years the ledger is summed over
+    roster_years = set()
+    row_offset = 0
+    for chunk in iter_chunks(roster_path, columns, chunk_size):
+        roster_years.update(_roster_arrays(chunk, row_offset, annual_limit)["year"].tolist())
+        row_offset += len(chunk[EMPLOYEE_COLUMN])
+    ytd = aggregate_contributions_by_year(ledger_path, [year] if year else roster_years, chunk_size)
+
+    def results():
+        row_offset = 0
+        for chunk in iter_chunks(roster_path, columns, chunk_size):
+            arrays = _roster_arrays(chunk, row_offset, annual_limit)
+            employees = [str(e) for e in chunk[EMPLOYEE_COLUMN]]
+            row_offset += len(employees)
+            contributions = np.fromiter((ytd.get((e, year or y), 0.0) for e, y in zip(employees, arrays["year"].tolist())),
+                                        dtype=np.float64, count=len(employees))
+
+            result = calculate_401k_contribution_batch(
+                arrays["year"],
+                arrays["month"],
+                arrays["gross_pay"],
+                contributions,
+                arrays["annual_limit"],
+                arrays["effective_periods"],
+                as_of=as_of,
+                frequency=frequency,
+                anchor=anchor,
+            )
+            result["employee_id"] = employees
+            result["contributions_so_far"] = contributions
+            yield result
+
+    return results()
+
+
+def main():
+    params = get_params()
+    # Everything that can reject the input runs before any output is written
+    try:
+        if params.roster:
+            results = calculate_contributions_from_ledger(params.roster, params.ledger, params.year,
+                                                          params.limit, chunk_size=params.chunk_size)
+        else:
+            ytd = aggregate_ytd_contributions(params.ledger, params.year, params.chunk_size)
+    except (OSError, ValueError) as e:
+        print(f"Cannot calculate contributions: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    output = sys.stdout if params.output == "-" else open(params.output, "w", newline="", encoding="utf-8")
+    try:
+        writer = csv.writer(output)
+        if not params.roster:
+            writer.writerow([EMPLOYEE_COLUMN, "contributions_so_far"])
+            writer.writerows(sorted(ytd.items()))
+            return
+
+        fieldnames = [EMPLOYEE_COLUMN, "contributions_so_far", "remaining_amount",
+                      "periods_left", "amount_per_period", "percent_per_period"]
+        writer.writerow(fieldnames)
+        for result in results:
+            writer.writerows(zip(*(result[name] for name in fieldnames)))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+            print(f"Results saved to {os.path.abspath(params.output)}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
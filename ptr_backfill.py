@@ -0,0 +1,225 @@
+import json
+import os
+import queue
+import sys
+import threading
+from argparse import ArgumentParser
+from collections import Counter, defaultdict, deque
+from datetime import date, datetime
+
+from ptr_download import RATE_LIMIT, WORKERS
+from ptr_extract import TEXT_CACHE_DIR, extract_transactions_parallel, queue_scanned_pdf
+from ptr_manifest import MANIFEST_FILE, FilingManifest
+from ptr_store import STORE_FILE, TransactionStore
+from stock_tracker import PDF_DIR, download_fd_archive, download_pdfs_from_xml, tag_transactions
+
+# First year the clerk publishes PTR filings for
+FIRST_YEAR = 2012
+
+CHECKPOINT_FILE = "backfill_checkpoint.json"
+
+# Filings downloaded but not yet extracted; downloads block when extraction falls this far behind
+QUEUE_SIZE = 64
+
+# Save the checkpoint after this many filings are stored
+CHECKPOINT_EVERY = 25
+
+# Work queue items: ("filing", year, doc_id, pdf_path) for each PDF to extract,
+# ("year", year, failed downloads) after a year's last filing, and _ALL_DONE at the end
+_ALL_DONE = None
+
+
+class BackfillCheckpoint:
+    """
+    Progress of a backfill: the filings whose transactions are stored, per year, and
+    the ended years finished without failures. Saved atomically, so an interrupted
+    backfill resumes where it stopped. Replaying a filing is harmless, as the store dedupes.
+    """
+
+    def __init__(self, path=CHECKPOINT_FILE):
+        self.path = path
+        self.completed_years = set()
+        self.filings = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.completed_years = set(data.get("completed_years", []))
+            self.filings = {year: set(doc_ids) for year, doc_ids in data.get("filings", {}).items()}
+
+    def save(self):
+        tmp_file = f"{self.path}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({
+                "completed_years": sorted(self.completed_years),
+                "filings": {year: sorted(doc_ids) for year, doc_ids in self.filings.items()},
+                "saved_at": datetime.now().isoformat(timespec="seconds"),
+            }, f, indent=1)
+        os.replace(tmp_file, self.path)
+
+    def is_year_complete(self, year):
+        return str(year) in self.completed_years
+
+    def has_filing(self, year, doc_id):
+        return doc_id in self.filings.get(str(year), ())
+
+    def record_filing(self, year, doc_id):
+        self.filings.setdefault(str(year), set()).add(doc_id)
+
+    def complete_year(self, year):
+        """A finished year needs no per-filing record any more."""
+        self.completed_years.add(str(year))
+        self.filings.pop(str(year), None)
+
+
+def _download_stage(years, work, checkpoint, manifest, pdf_dir, workers, rate_limit):
+    """Sync each year's ZIP and PDFs, handing every filing not yet stored to the work queue."""
+    try:
+        for year in years:
+            print(f"Backfill {year}: downloading filings...")
+            fd_archive = download_fd_archive(year=str(year), manifest=manifest)
+            if fd_archive is None:
+                print(f"Backfill {year}: skipped, the filings index could not be downloaded")
+                continue
+
+            def enqueue(doc_id, output_file):
+                if not checkpoint.has_filing(year, doc_id):
+                    # Blocks while extraction is QUEUE_SIZE filings behind
+                    work.put(("filing", year, doc_id, output_file))
+
+            stats = download_pdfs_from_xml(fd_archive, pdf_dir, year=str(year), workers=workers, rate_limit=rate_limit,
+                                           manifest=manifest, on_filing=enqueue)
+            work.put(("year", year, len(stats["failed"])))
+    except Exception as e:
+        print(f"Backfill download stage stopped: {type(e).__name__}: {e}")
+    finally:
+        work.put(_ALL_DONE)
+
+
+def backfill(years, store, checkpoint, manifest, pdf_dir=PDF_DIR, workers=WORKERS, rate_limit=RATE_LIMIT,
+             processes=None, cache_dir=TEXT_CACHE_DIR, queue_size=QUEUE_SIZE):
+    """
+    Backfill the transactions of every PTR filed in `years` into the store. A download
+    thread fills a bounded work queue as PDFs arrive while a process pool extracts and
+    parses them, so downloads overlap CPU-bound extraction across years. Filings are
+    checkpointed once stored; a year that has ended is checkpointed once all its filings
+    succeeded. The current year stays open, so every run syncs its new filings.
+    Scanned PDFs go to the OCR queue file.
+    Returns {"filings": stored, "failed": failed, "scanned": queued for OCR, "transactions": new rows}.
+    """
+    years = [year for year in years if not checkpoint.is_year_complete(year)]
+    work = queue.Queue(maxsize=queue_size)
+    # (year, doc_id) of each PDF submitted, oldest first; a path can be queued more than once
+    in_flight = defaultdict(deque)
+    pending = Counter()
+    failed = Counter()
+    downloaded_years = set()
+    totals = {"filings": 0, "failed": 0, "scanned": 0, "transactions": 0}
+
+    def take(pdf_path):
+        """(year, doc_id) of the oldest submission of pdf_path; results come back in input order."""
+        submissions = in_flight[pdf_path]
+        year_doc_id = submissions.popleft()
+        if not submissions:
+            del in_flight[pdf_path]
+        return year_doc_id
+
+    def finish_years():
+        for year in sorted(downloaded_years):
+            if pending[year] == 0:
+                downloaded_years.discard(year)
+                if failed[year]:
+                    print(f"Backfill {year}: {failed[year]} filings failed; they are retried on the next run")
+                elif year >= date.today().year:
+                    # Filings keep arriving until the year ends; only its stored filings are checkpointed
+                    print(f"Backfill {year}: up to date; the year is still open, so it is synced again on the next run")
+                else:
+                    checkpoint.complete_year(year)
+                    print(f"Backfill {year}: complete")
+                checkpoint.save()
+
+    def pdf_paths():
+        while True:
+            item = work.get()
+            if item is _ALL_DONE:
+                return
+            if item[0] == "year":
+                _, year, failed_downloads = item
+                failed[year] += failed_downloads
+                totals["failed"] += failed_downloads
+                downloaded_years.add(year)
+                finish_years()
+                continue
+            _, year, doc_id, pdf_path = item
+            in_flight[pdf_path].append((year, doc_id))
+            pending[year] += 1
+            yield pdf_path
+
+    def on_error(pdf_path, error):
+        year, _ = take(pdf_path)
+        pending[year] -= 1
+        failed[year] += 1
+        totals["failed"] += 1
+
+    def on_scanned(pdf_path):
+        # Scans are handed to the OCR queue; they do not hold their year open
+        queue_scanned_pdf(pdf_path)
+        year, doc_id = take(pdf_path)
+        checkpoint.record_filing(year, doc_id)
+        pending[year] -= 1
+        totals["scanned"] += 1
+
+    downloader = threading.Thread(target=_download_stage, daemon=True,
+                                  args=(years, work, checkpoint, manifest, pdf_dir, workers, rate_limit))
+    downloader.start()
+    try:
+        for pdf_path, transactions in extract_transactions_parallel(pdf_paths(), processes, cache_dir, on_error,
+                                                                   on_scanned):
+            year, doc_id = take(pdf_path)
+            totals["transactions"] += store.add(tag_transactions(pdf_path, transactions))
+            checkpoint.record_filing(year, doc_id)
+            pending[year] -= 1
+            totals["filings"] += 1
+            if totals["filings"] % CHECKPOINT_EVERY == 0:
+                checkpoint.save()
+            finish_years()
+        finish_years()
+    finally:
+        checkpoint.save()
+    downloader.join()
+    return totals
+
+
+def get_params():
+    parser = ArgumentParser(prog='ptr_backfill.py', description='Backfill PTR transactions for a range of years into the transaction store')
+    parser.add_argument("--from-year", dest="first_year", action="store", type=int, default=FIRST_YEAR)
+    parser.add_argument("--to-year", dest="last_year", action="store", type=int, default=date.today().year)
+    parser.add_argument("-w", "--workers", action="store", type=int, default=WORKERS, help="Concurrent PDF downloads")
+    parser.add_argument("--rate-limit", action="store", type=float, default=RATE_LIMIT, help="Max requests per second to the clerk's site (0 = unlimited)")
+    parser.add_argument("-p", "--processes", action="store", type=int, default=None, help="Worker processes for PDF text extraction (default: one per CPU)")
+    parser.add_argument("--queue-size", action="store", type=int, default=QUEUE_SIZE, help="Downloaded filings allowed to wait for extraction")
+    parser.add_argument("--text-cache", action="store", default=TEXT_CACHE_DIR, help="Cache of extracted PDF text keyed by content hash (empty string disables)")
+    parser.add_argument("--db", action="store", default=STORE_FILE, help="SQLite store the transactions are appended to")
+    parser.add_argument("-m", "--manifest", action="store", default=MANIFEST_FILE, help="Manifest of downloaded filings")
+    parser.add_argument("-c", "--checkpoint", action="store", default=CHECKPOINT_FILE, help="Backfill progress; delete it to start over")
+    return parser.parse_args(sys.argv[1:])
+
+
+def main():
+    params = get_params()
+    checkpoint = BackfillCheckpoint(params.checkpoint)
+    years = range(params.first_year, params.last_year + 1)
+    with TransactionStore(params.db) as store:
+        totals = backfill(years, store, checkpoint, FilingManifest(params.manifest), PDF_DIR, params.workers,
+                          params.rate_limit, params.processes, params.text_cache, params.queue_size)
+    print(f"Backfill stored {totals['transactions']} new transactions from {totals['filings']} filings; "
+          f"{totals['failed']} filings failed, {totals['scanned']} scanned filings queued for OCR")
+    # The current year is never complete; it only fails the run if its filings did
+    remaining = [year for year in years if year < date.today().year and not checkpoint.is_year_complete(year)]
+    if remaining:
+        print(f"Years not complete yet: {', '.join(map(str, remaining))}")
+    if remaining or totals["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Download defaults: parallel connections, retry policy and per-host request rate
+WORKERS = 8
+RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RATE_LIMIT = 5.0  # requests per second per host; 0 disables
+TIMEOUT = 30
+CHUNK_SIZE = 64 * 1024
+
+
+def make_session(pool_size=WORKERS, retries=RETRIES, backoff_factor=BACKOFF_FACTOR):
+    """A requests session with a connection pool sized for pool_size threads and retry with backoff."""
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class RateLimiter:
+    """Spaces requests to each host at least 1/rate seconds apart, across threads."""
+
+    def __init__(self, rate=RATE_LIMIT):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def download_file(session, url, output_file, rate_limiter=None, timeout=TIMEOUT):
+    """
+    Stream url to output_file through a temporary file, so a failed download never
+    leaves a partial file behind. Returns (bytes written, sha256 hex digest).
+    The rate limiter spaces only the first attempt. The session's urllib3 retries bypass
+    it, paced instead by their backoff (0.5s, 1s, 2s by default) and any Retry-After, so
+    they can come faster than a rate_limit below 2 requests per second.
+    """
+    if rate_limiter:
+        rate_limiter.wait(url)
+    with session.get(url, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        return _stream_to_file(response, output_file)
+
+
+def download_archive(url, output_file, headers=None, session=None, timeout=TIMEOUT):
+    """
+    Stream a large file (such as a yearly FD ZIP) to disk in chunks, sending any
+    conditional headers. Returns None if the server answers 304 Not Modified,
+    otherwise (response headers, bytes written, sha256 hex digest).
+    """
+    session = session or make_session(1)
+    with session.get(url, headers=headers or {}, timeout=timeout, stream=True) as response:
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        size, sha256 = _stream_to_file(response, output_file)
+        return response.headers, size, sha256
+
+
+def _stream_to_file(response, output_file):
+    tmp_file = f"{output_file}.part"
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_file, "wb") as file:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                file.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+        os.replace(tmp_file, output_file)
+    except BaseException:
+        # Interrupted or failed mid-stream: drop the partial download
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    return size, digest.hexdigest()
+
+
+def download_files(jobs, workers=WORKERS, rate_limit=RATE_LIMIT, session=None, on_download=None):
+    """
+    Download (url, output_file) jobs over a pooled session with bounded concurrency.
+    on_download(url, output_file, size, sha256) is called from this thread as each file
+    completes. Failures are collected rather than raised. Returns a stats dict with
+    downloaded, bytes, failed ([(url, error)]) and elapsed seconds, and prints a summary.
+    """
+    session = session or make_session(workers)
+    rate_limiter = RateLimiter(rate_limit)
+    stats = {"downloaded": 0, "bytes": 0, "failed": [], "elapsed": 0.0}
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(download_file, session, url, output_file, rate_limiter): (url, output_file)
+                   for url, output_file in jobs}
+        for future in as_completed(futures):
+            url, output_file = futures[future]
+            try:
+                size, sha256 = future.result()
+                stats["bytes"] += size
+                stats["downloaded"] += 1
+                print(f"Downloaded: {output_file}")
+                if on_download:
+                    on_download(url, output_file, size, sha256)
+            except (requests.exceptions.RequestException, OSError) as e:
+                stats["failed"].append((url, str(e)))
+                print(f"Failed to download {url}: {e}")
+
+    stats["elapsed"] = time.perf_counter() - start
+    print_download_summary(stats)
+    return stats
+
+
+def print_download_summary(stats):
+    elapsed = stats["elapsed"] or 1e-9
+    print(f"Downloaded {stats['downloaded']} files ({stats['bytes'] / 1024 ** 2:.1f} MB) in {elapsed:.1f}s: "
+          f"{stats['downloaded'] / elapsed:.1f} files/s, {stats['bytes'] / 1024 ** 2 / elapsed:.2f} MB/s; "
+          f"{len(stats['failed'])} failed")
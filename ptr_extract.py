@@ -0,0 +1,293 @@
+import collections
+import hashlib
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pdfplumber
+
+# Cleaned PDF text is cached by PDF content hash, so re-runs skip PDF rendering.
+# Bump CLEAN_TEXT_VERSION whenever extraction or clean_extracted_text changes output.
+TEXT_CACHE_DIR = os.environ.get("PTR_TEXT_CACHE", "pdf_text_cache")
+CLEAN_TEXT_VERSION = 3
+EXTRACTOR_VERSION = f"pdfplumber-{pdfplumber.__version__}-clean{CLEAN_TEXT_VERSION}"
+
+# Image-only (scanned, usually paper-filed) PDFs are listed here for OCR instead of being parsed
+SCANNED_QUEUE_FILE = os.environ.get("PTR_SCANNED_QUEUE", "scanned_filings.txt")
+
+# The certification section closes a PTR; pages after it are signature boilerplate.
+# Its "C S" heading stands alone on its line, unlike asset names such as "C Shares (GFACX)"
+_CERTIFICATION = re.compile(r"^(?:C S$|I CERTIFY\b)", re.MULTILINE)
+
+
+class ScannedPDFError(Exception):
+    """A page of the PDF has no text layer, only images, so it needs OCR."""
+
+def iter_pdf_page_text(pdf_path, page_stats=None):
+    """
+    Yield the text of a PDF page by page, opening each page only when it is reached.
+    Pages without text are skipped, and reading stops after the page with the
+    certification section. A page before it with images but no text means the PDF
+    is (partly) scanned: ScannedPDFError is raised before any more pages are rendered.
+    page_stats, if given, counts the pages "processed" and "skipped".
+    """
+    page_stats = page_stats if page_stats is not None else collections.Counter()
+    with pdfplumber.open(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+        for number, page in enumerate(pdf.pages, 1):
+            try:
+                # page.chars is cheap next to extract_text's layout pass
+                if not page.chars:
+                    if page.images:
+                        page_stats["skipped"] += page_count - number + 1
+                        raise ScannedPDFError(f"{pdf_path} page {number} has images but no text")
+                    page_stats["skipped"] += 1
+                    continue
+                text = page.extract_text() or ""
+            finally:
+                page.close()
+            page_stats["processed"] += 1
+            yield text
+            if _CERTIFICATION.search(text):
+                page_stats["skipped"] += page_count - number
+                return
+
+def extract_text_from_pdf_with_pdfplumber(pdf_path, page_stats=None):
+    # Join pages once at the end; each page starts on its own line
+    return "\n".join(iter_pdf_page_text(pdf_path, page_stats))
+
+def clean_extracted_text(text):
+    # First, replace unwanted characters (except for newlines) with a placeholder
+    # Keep \n (newlines) intact and replace other control characters and non-printable characters
+    text = re.sub(r'[^\x20-\x7E\n]', '', text)  # Remove non-ASCII printable characters except newline
+    
+    # Then, normalize excessive spaces to a single space (preserve newlines)
+    text = re.sub(r'[ \t]+', ' ', text)  # Replace multiple spaces and tabs with a single space
+    
+    # Optional: Clean up unnecessary spaces around newlines, if required
+    text = re.sub(r'\n+', '\n', text)  # Replace multiple newlines with a single newline
+    
+    return text
+
+# Owner codes on PTR rows; a row without one is the filer's own
+OWNER_CODES = {"SP": "spouse", "JT": "joint", "DC": "dependent child"}
+
+# Labelled sub-lines under a transaction row ("F S : New", "D : ...") and the fields they fill
+_FIELD_LABELS = {"F S": "filing_status", "S O": "subholding_of", "D": "description", "C": "comment", "L": "location"}
+
+TRANSACTION_FIELDS = ["owner", "asset", "ticker", "asset_type", "transaction_type", "transaction_date",
+                      "notification_date", "amount", "amount_min", "amount_max", *_FIELD_LABELS.values()]
+
+# Every line of PTR text is classified by one match against this pattern; lastgroup names the token.
+# The anchored labels come first so most non-row lines fail fast before the row pattern's scan.
+_LINE_TOKENS = re.compile(r"""
+    (?P<field>(?P<label>F\ S|S\ O|D|C|L)\ ?:\ ?(?P<value>.*))
+  | (?P<section>(?:P\ T\ R|F\ I|T|I\ P\ O|C\ S)$)
+  | (?P<header>ID\ Owner\ Asset|Type\ Date\ Gains|Gains\ >|\$200\?|Filing\ ID|Name:|Status:|State/District:
+        |Clerk\ of\ the\ House|\*\ For\ the\ complete\ list)
+  | (?P<row>(?:(?P<owner>SP|JT|DC)\ )?(?P<asset>.+?)
+        \ (?P<type>P|S\ \(partial\)|S|E)
+        \ (?P<date>\d{2}/\d{2}/\d{4})\ (?P<notified>\d{2}/\d{2}/\d{4})
+        \ (?P<amount>(?:Spouse/DC\ )?Over\ \$[\d,]+|\$[\d,]+(?:\ -(?:\ \$[\d,]+)?)?))
+""", re.VERBOSE)
+
+# Second line of a wrapped row: the rest of the asset name and, if the range was cut, its upper bound
+_ROW_CONTINUATION = re.compile(r"(?P<asset>.*?)\ ?(?P<amount>\$[\d,]+)?$")
+_TICKER = re.compile(r"\(([A-Z][A-Z0-9.\-/]*)\)")
+_ASSET_TYPE = re.compile(r"\[([A-Z]{2})\]")
+_DOLLARS = re.compile(r"\$([\d,]+)")
+
+# Tokenizer states: outside a row, on a row's wrapped lines, inside a labelled field
+_IDLE, _ROW, _FIELD = range(3)
+
+
+def _finish_transaction(transaction):
+    asset = transaction["asset"]
+    ticker = _TICKER.findall(asset)
+    asset_type = _ASSET_TYPE.search(asset)
+    transaction["ticker"] = ticker[-1] if ticker else ""
+    transaction["asset_type"] = asset_type.group(1) if asset_type else ""
+    transaction["asset"] = " ".join(_ASSET_TYPE.sub("", _TICKER.sub("", asset)).split())
+
+    amounts = [int(value.replace(",", "")) for value in _DOLLARS.findall(transaction["amount"])]
+    if amounts:
+        transaction["amount_min"] = amounts[0]
+        # "Over $X" and a range cut off at the page edge have no upper bound
+        if len(amounts) > 1:
+            transaction["amount_max"] = amounts[1]
+    return transaction
+
+
+def parse_transactions(data):
+    """
+    Parse cleaned PTR text into transaction dicts with the TRANSACTION_FIELDS keys.
+    A single pass: each line is classified once by _LINE_TOKENS and drives a small
+    state machine, so wrapped asset names, amount ranges and descriptions are joined
+    onto the row they belong to.
+    """
+    transactions = []
+    transaction = None
+    state = _IDLE
+    field = None
+    match_line = _LINE_TOKENS.match
+
+    for line in data.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        match = match_line(line)
+        token = match.lastgroup if match else None
+
+        if token == "row":
+            if transaction:
+                transactions.append(_finish_transaction(transaction))
+            owner, asset, transaction_type, transaction_date, notification_date, amount = match.group(
+                "owner", "asset", "type", "date", "notified", "amount")
+            transaction = dict.fromkeys(TRANSACTION_FIELDS, "")
+            transaction.update(owner=owner or "", asset=asset, transaction_type=transaction_type,
+                               transaction_date=transaction_date, notification_date=notification_date, amount=amount)
+            state = _ROW
+        elif token == "field":
+            if transaction:
+                field = _FIELD_LABELS[match.group("label")]
+                transaction[field] = match.group("value").strip()
+                state = _FIELD
+        elif token == "section":
+            # A new part of the form ends the transactions table
+            if transaction:
+                transactions.append(_finish_transaction(transaction))
+            transaction = None
+            state = _IDLE
+        elif token == "header":
+            # Repeated page/table headers; the current row may still get its fields on the next page
+            state = _IDLE
+        elif state == _ROW:
+            continuation = _ROW_CONTINUATION.match(line)
+            if continuation.group("asset"):
+                transaction["asset"] += " " + continuation.group("asset")
+            if continuation.group("amount") and transaction["amount"].endswith("-"):
+                transaction["amount"] += " " + continuation.group("amount")
+        elif state == _FIELD:
+            transaction[field] += " " + line
+
+    if transaction:
+        transactions.append(_finish_transaction(transaction))
+    return transactions
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cached_clean_text(pdf_path, cache_dir=TEXT_CACHE_DIR, page_stats=None):
+    """
+    Cleaned text of a PDF, read from the cache when this PDF's content was already
+    extracted by the same extractor version; otherwise extracted and stored.
+    A falsy cache_dir disables the cache. Scanned PDFs are not cached.
+    """
+    if not cache_dir:
+        return clean_extracted_text(extract_text_from_pdf_with_pdfplumber(pdf_path, page_stats))
+
+    sha256 = _file_sha256(pdf_path)
+    cache_file = os.path.join(cache_dir, sha256[:2], f"{sha256}.{EXTRACTOR_VERSION}.txt")
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+
+    text = clean_extracted_text(extract_text_from_pdf_with_pdfplumber(pdf_path, page_stats))
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    # Workers may write the same entry at once; each uses its own temp file
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_file, cache_file)
+    return text
+
+
+def extract_transactions_from_pdf(pdf_path, cache_dir=TEXT_CACHE_DIR):
+    """
+    Extract, clean and parse one PDF. Runs in a worker process, so errors are
+    returned instead of raised: (pdf_path, transactions or None, error or None, page stats).
+    """
+    page_stats = collections.Counter()
+    try:
+        clean_data = cached_clean_text(pdf_path, cache_dir, page_stats)
+        transactions = parse_transactions(clean_data) if clean_data else []
+        return pdf_path, transactions, None, page_stats
+    except ScannedPDFError as e:
+        page_stats["scanned"] += 1
+        return pdf_path, None, str(e), page_stats
+    except Exception as e:
+        return pdf_path, None, f"{type(e).__name__}: {e}", page_stats
+
+
+def queue_scanned_pdf(pdf_path, queue_file=SCANNED_QUEUE_FILE):
+    """Append a scanned PDF to the OCR queue file, once."""
+    try:
+        with open(queue_file, encoding="utf-8") as f:
+            if pdf_path in f.read().splitlines():
+                return
+    except FileNotFoundError:
+        pass
+    with open(queue_file, "a", encoding="utf-8") as f:
+        f.write(pdf_path + "\n")
+
+
+def extract_transactions_parallel(pdf_paths, workers=None, cache_dir=TEXT_CACHE_DIR, on_error=None,
+                                  on_scanned=queue_scanned_pdf):
+    """
+    Fan PDF extraction and parsing out across a process pool of `workers` processes
+    (default: one per CPU), reusing cached text from cache_dir. Yields (pdf_path, transactions)
+    in the order of pdf_paths no matter which worker finishes first, keeping at most two
+    PDFs per worker in flight, so memory stays flat however many PDFs stream in.
+    PDFs that fail are logged and skipped, and passed to on_error(pdf_path, error) if given;
+    scanned PDFs are passed to on_scanned(pdf_path) instead. Prints page counts at the end.
+    """
+    workers = workers or os.cpu_count() or 1
+    extract = partial(extract_transactions_from_pdf, cache_dir=cache_dir)
+    stats = collections.Counter()
+    if workers == 1:
+        yield from _log_failures(map(extract, pdf_paths), stats, on_error, on_scanned)
+        print_extraction_summary(stats)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = collections.deque()
+        for pdf_path in pdf_paths:
+            pending.append(executor.submit(extract, pdf_path))
+            if len(pending) >= 2 * workers:
+                yield from _log_failures([pending.popleft().result()], stats, on_error, on_scanned)
+        while pending:
+            yield from _log_failures([pending.popleft().result()], stats, on_error, on_scanned)
+    print_extraction_summary(stats)
+
+
+def _log_failures(results, stats, on_error=None, on_scanned=None):
+    for pdf_path, transactions, error, page_stats in results:
+        print(f"Processing {pdf_path}...")
+        stats.update(page_stats)
+        stats["pdfs"] += 1
+        if page_stats["scanned"]:
+            print(f"Scanned PDF, queued for OCR: {pdf_path}")
+            if on_scanned:
+                on_scanned(pdf_path)
+            continue
+        if error:
+            stats["failed"] += 1
+            print(f"Failed to process {pdf_path}: {error}")
+            if on_error:
+                on_error(pdf_path, error)
+            continue
+        yield pdf_path, transactions
+
+
+def print_extraction_summary(stats):
+    print(f"Extracted {stats['pdfs']} PDFs: {stats['processed']} pages processed, {stats['skipped']} skipped; "
+          f"{stats['scanned']} scanned PDFs queued for OCR, {stats['failed']} failed")
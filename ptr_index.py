@@ -0,0 +1,110 @@
+import xml.etree.ElementTree as ET
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, namedtuple
+from datetime import datetime
+
+# FilingType codes in the FD XML; "P" is a periodic transaction report (PTR)
+PTR_FILING_TYPES = ("P",)
+
+Filing = namedtuple("Filing", ["doc_id", "last_name", "first_name", "filing_type",
+                               "state_district", "filing_date", "year"])
+
+
+def _parse_filing_date(text):
+    try:
+        return datetime.strptime(text, "%m/%d/%Y").date()
+    except (TypeError, ValueError):
+        return None
+
+
+def iter_filings(xml_stream, filing_types=PTR_FILING_TYPES):
+    """
+    Stream Filing records out of an FD XML file with iterparse, keeping only the
+    fields we need and only the given filing types (None keeps every type).
+    Members are dropped from the tree once read, so memory stays flat.
+    """
+    root = None
+    for event, element in ET.iterparse(xml_stream, events=("start", "end")):
+        if root is None:
+            root = element
+        if event != "end" or element.tag != "Member":
+            continue
+        fields = {child.tag: (child.text or "").strip() for child in element}
+        root.clear()
+        if filing_types and fields.get("FilingType") not in filing_types:
+            continue
+        yield Filing(
+            doc_id=fields.get("DocID"),
+            last_name=fields.get("Last"),
+            first_name=fields.get("First"),
+            filing_type=fields.get("FilingType"),
+            state_district=fields.get("StateDst"),
+            filing_date=_parse_filing_date(fields.get("FilingDate")),
+            year=fields.get("Year"),
+        )
+
+
+class FilingIndex:
+    """
+    In-memory index over the filings of an FD XML file, built in one streaming pass.
+    Answers lookups by last name, state/district and filing date range without re-parsing.
+    """
+
+    def __init__(self, filings):
+        self.filings = list(filings)
+        self._by_last_name = defaultdict(list)
+        self._by_state = defaultdict(list)
+        self._by_state_district = defaultdict(list)
+        for position, filing in enumerate(self.filings):
+            self._by_last_name[(filing.last_name or "").lower()].append(position)
+            state_district = (filing.state_district or "").upper()
+            self._by_state[state_district[:2]].append(position)
+            self._by_state_district[state_district].append(position)
+
+        dated = sorted((filing.filing_date, position) for position, filing in enumerate(self.filings)
+                       if filing.filing_date)
+        self._dates = [filing_date for filing_date, _ in dated]
+        self._date_positions = [position for _, position in dated]
+
+    @classmethod
+    def from_xml(cls, xml_stream, filing_types=PTR_FILING_TYPES):
+        return cls(iter_filings(xml_stream, filing_types))
+
+    def __len__(self):
+        return len(self.filings)
+
+    def _state_positions(self, state, district=None):
+        if district is None and len(state) <= 2:
+            return self._by_state.get(state.upper(), [])
+        key = state.upper() if district is None else f"{state.upper()}{int(district):02d}"
+        return self._by_state_district.get(key, [])
+
+    def _date_positions_between(self, start=None, end=None):
+        lo = bisect_left(self._dates, start) if start else 0
+        hi = bisect_right(self._dates, end) if end else len(self._dates)
+        return self._date_positions[lo:hi]
+
+    def by_last_name(self, last_name):
+        return [self.filings[p] for p in self._by_last_name.get(last_name.lower(), [])]
+
+    def by_state(self, state, district=None):
+        """Filings for a state ("CA") or a state and district ("CA", 11 or "CA11")."""
+        return [self.filings[p] for p in self._state_positions(state, district)]
+
+    def in_date_range(self, start=None, end=None):
+        """Filings with a filing date between start and end, inclusive; either bound may be None."""
+        return [self.filings[p] for p in sorted(self._date_positions_between(start, end))]
+
+    def query(self, last_name=None, state=None, district=None, start=None, end=None):
+        """Filings matching every filter given, in XML order."""
+        matches = []
+        if last_name:
+            matches.append(self._by_last_name.get(last_name.lower(), []))
+        if state:
+            matches.append(self._state_positions(state, district))
+        if start or end:
+            matches.append(self._date_positions_between(start, end))
+        if not matches:
+            return list(self.filings)
+        positions = set(matches[0]).intersection(*matches[1:])
+        return [self.filings[p] for p in sorted(positions)]
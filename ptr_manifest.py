@@ -0,0 +1,66 @@
+import json
+import os
+from datetime import datetime
+
+MANIFEST_FILE = "filings_manifest.json"
+
+
+class FilingManifest:
+    """
+    Local record of what has already been downloaded, so syncs only fetch what is new.
+    Filings are keyed by year and DocID and record file, size, sha256 and download time;
+    yearly ZIPs keep the ETag/Last-Modified validators for conditional requests.
+    """
+
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = path
+        self.filings = {}
+        self.archives = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.filings = data.get("filings", {})
+            self.archives = data.get("archives", {})
+
+    def save(self):
+        """Write the manifest atomically, so an interrupted run never leaves it half-written."""
+        tmp_file = f"{self.path}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"filings": self.filings, "archives": self.archives}, f, indent=1, sort_keys=True)
+        os.replace(tmp_file, self.path)
+
+    @staticmethod
+    def _key(year, doc_id):
+        return f"{year}/{doc_id}"
+
+    def has_filing(self, year, doc_id, output_file):
+        """True if the filing was downloaded before and the file on disk still matches it."""
+        entry = self.filings.get(self._key(year, doc_id))
+        return bool(entry and os.path.exists(output_file) and os.path.getsize(output_file) == entry["size"])
+
+    def record_filing(self, year, doc_id, output_file, size, sha256):
+        self.filings[self._key(year, doc_id)] = {
+            "file": output_file,
+            "size": size,
+            "sha256": sha256,
+            "downloaded_at": datetime.now().isoformat(timespec="seconds"),
+        }
+
+    def conditional_headers(self, year):
+        """If-None-Match/If-Modified-Since headers for the year's ZIP, if we have validators."""
+        entry = self.archives.get(str(year), {})
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record_archive(self, year, response_headers, size, sha256):
+        self.archives[str(year)] = {
+            "etag": response_headers.get("ETag"),
+            "last_modified": response_headers.get("Last-Modified"),
+            "size": size,
+            "sha256": sha256,
+            "downloaded_at": datetime.now().isoformat(timespec="seconds"),
+        }
@@ -0,0 +1,207 @@
+import csv
+import os
+import sqlite3
+import sys
+from argparse import ArgumentParser
+from datetime import date, datetime
+
+from ptr_extract import TRANSACTION_FIELDS
+
+# Append-only history of every parsed PTR transaction
+STORE_FILE = os.environ.get("PTR_STORE", "transactions.db")
+
+# Rows are keyed by the filing's DocID and the transaction's position in it
+STORE_COLUMNS = ["doc_id", "line", "member", *TRANSACTION_FIELDS, "source_file", "added_at"]
+
+# Rows inserted between commits when recording a stream of transactions
+COMMIT_EVERY = 1000
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS transactions (
+    {", ".join(f"{name} {'INTEGER' if name in ('line', 'amount_min', 'amount_max') else 'TEXT'}"
+               for name in STORE_COLUMNS)},
+    PRIMARY KEY (doc_id, line)
+);
+CREATE INDEX IF NOT EXISTS transactions_ticker ON transactions (ticker, transaction_date);
+-- Member filters compare case-insensitively, which only a NOCASE index serves
+DROP INDEX IF EXISTS transactions_member;
+CREATE INDEX IF NOT EXISTS transactions_member_nocase ON transactions (member COLLATE NOCASE, transaction_date);
+CREATE INDEX IF NOT EXISTS transactions_date ON transactions (transaction_date);
+"""
+
+_INSERT = (f"INSERT OR IGNORE INTO transactions ({', '.join(STORE_COLUMNS)}) "
+           f"VALUES ({', '.join('?' for _ in STORE_COLUMNS)})")
+
+
+def _iso_date(text):
+    """PTR dates are MM/DD/YYYY; store them as ISO so ranges sort and index correctly."""
+    try:
+        return datetime.strptime(text, "%m/%d/%Y").date().isoformat()
+    except (TypeError, ValueError):
+        return text or None
+
+
+def quarter_range(quarter):
+    """First and last day of a quarter written as 2025Q2."""
+    year, q = quarter.upper().split("Q")
+    first_month = 3 * (int(q) - 1) + 1
+    if not 1 <= first_month <= 10:
+        raise ValueError(f"Not a quarter: {quarter}")
+    start = date(int(year), first_month, 1)
+    end = date(int(year) + 1, 1, 1) if first_month == 10 else date(int(year), first_month + 3, 1)
+    return start, date.fromordinal(end.toordinal() - 1)
+
+
+class TransactionStore:
+    """
+    SQLite store of PTR transactions, indexed by ticker, member, transaction date and DocID.
+    Inserts ignore a (DocID, line) that is already stored, so re-running over the same
+    filings never duplicates rows and never overwrites history.
+    """
+
+    def __init__(self, path=STORE_FILE):
+        self.path = path
+        self.inserted = 0
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _row(self, transaction, added_at):
+        values = dict(transaction, added_at=added_at)
+        values["transaction_date"] = _iso_date(values.get("transaction_date"))
+        values["notification_date"] = _iso_date(values.get("notification_date"))
+        return [values.get(name) if values.get(name) != "" else None for name in STORE_COLUMNS]
+
+    def record(self, transactions, commit_every=COMMIT_EVERY):
+        """
+        Insert transactions as they stream past and yield each one on, committing every
+        commit_every rows and at the end. Each needs doc_id and line. Sets self.inserted.
+        """
+        added_at = datetime.now().isoformat(timespec="seconds")
+        self.inserted = 0
+        pending = 0
+        try:
+            for transaction in transactions:
+                self.inserted += self.connection.execute(_INSERT, self._row(transaction, added_at)).rowcount
+                pending += 1
+                if pending >= commit_every:
+                    self.connection.commit()
+                    pending = 0
+                yield transaction
+        finally:
+            self.connection.commit()
+
+    def add(self, transactions):
+        """Insert transactions; returns how many were new."""
+        for _ in self.record(transactions):
+            pass
+        return self.inserted
+
+    def _where(self, ticker=None, member=None, transaction_type=None, start=None, end=None, doc_id=None):
+        clauses, args = [], []
+        if ticker:
+            clauses.append("ticker = ?")
+            args.append(ticker.upper())
+        if member:
+            clauses.append("member = ? COLLATE NOCASE")
+            args.append(member)
+        if transaction_type:
+            # "S" also matches partial sales, "S (partial)"
+            clauses.append("(transaction_type = ? OR transaction_type LIKE ?)")
+            args += [transaction_type, f"{transaction_type} (%"]
+        if start:
+            clauses.append("transaction_date >= ?")
+            args.append(str(start))
+        if end:
+            clauses.append("transaction_date <= ?")
+            args.append(str(end))
+        if doc_id:
+            clauses.append("doc_id = ?")
+            args.append(str(doc_id))
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), args
+
+    def query(self, ticker=None, member=None, transaction_type=None, start=None, end=None, doc_id=None):
+        """
+        Transactions matching every filter given, as dicts in date order. start and end are
+        inclusive dates; transaction_type is P, S or E.
+        """
+        where, args = self._where(ticker, member, transaction_type, start, end, doc_id)
+        cursor = self.connection.execute(
+            f"SELECT {', '.join(STORE_COLUMNS)} FROM transactions{where} ORDER BY transaction_date, doc_id, line", args)
+        for row in cursor:
+            yield dict(row)
+
+    def count(self, **filters):
+        where, args = self._where(**filters)
+        return self.connection.execute(f"SELECT COUNT(*) FROM transactions{where}", args).fetchone()[0]
+
+    def export_parquet(self, path, batch_size=50_000, **filters):
+        """Write the matching transactions to a Parquet file in batches; returns the row count."""
+        import pyarrow as pa  # optional; only needed for Parquet exports
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([(name, pa.int64() if name in ("line", "amount_min", "amount_max") else pa.string())
+                            for name in STORE_COLUMNS])
+        rows = 0
+        batch = []
+        with pq.ParquetWriter(path, schema) as writer:
+            for transaction in self.query(**filters):
+                batch.append(transaction)
+                if len(batch) >= batch_size:
+                    writer.write_table(pa.Table.from_pylist(batch, schema))
+                    rows += len(batch)
+                    batch = []
+            if batch or not rows:
+                writer.write_table(pa.Table.from_pylist(batch, schema))
+                rows += len(batch)
+        return rows
+
+
+def get_params():
+    parser = ArgumentParser(prog='ptr_store.py', description='Query the stored PTR transactions, or export them to Parquet')
+    parser.add_argument("--db", action="store", default=STORE_FILE, help="SQLite transaction store")
+    parser.add_argument("-t", "--ticker", action="store")
+    parser.add_argument("-l", "--last_name", dest="member", action="store")
+    parser.add_argument("--type", dest="transaction_type", action="store", choices=("P", "S", "E"),
+                        help="P purchases, S sales (including partial), E exchanges")
+    parser.add_argument("-q", "--quarter", action="store", help="Only this quarter, e.g. 2025Q2")
+    parser.add_argument("--from", dest="start", action="store", type=date.fromisoformat, help="Transaction date on or after (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", action="store", type=date.fromisoformat, help="Transaction date on or before (YYYY-MM-DD)")
+    parser.add_argument("--doc-id", action="store")
+    parser.add_argument("--parquet", action="store", help="Export the matching transactions to this Parquet file")
+    return parser.parse_args(sys.argv[1:])
+
+
+def main():
+    params = get_params()
+    start, end = params.start, params.end
+    if params.quarter:
+        try:
+            start, end = quarter_range(params.quarter)
+        except ValueError:
+            print(f"Invalid quarter {params.quarter!r}; use the form 2025Q2")
+            sys.exit(1)
+    filters = dict(ticker=params.ticker, member=params.member, transaction_type=params.transaction_type,
+                   start=start, end=end, doc_id=params.doc_id)
+
+    with TransactionStore(params.db) as store:
+        if params.parquet:
+            rows = store.export_parquet(params.parquet, **filters)
+            print(f"Exported {rows} transactions to {params.parquet}")
+            return
+        writer = csv.DictWriter(sys.stdout, fieldnames=STORE_COLUMNS)
+        writer.writeheader()
+        writer.writerows(store.query(**filters))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import numpy as np
+
+# Default market and plan assumptions (annual rates)
+MEAN_RETURN = 0.07
+VOLATILITY = 0.15
+SALARY_GROWTH = 0.03
+LIMIT_GROWTH = 0.02
+PERCENTILES = (10, 50, 90)
+
+# Upper bound on the (employees x paths x periods) float64 block simulated at once
+MAX_CHUNK_BYTES = 256 * 1024 ** 2
+
+
+def contribution_schedule(annual_salary, periods_left, amount_per_period, percent_per_period,
+                          annual_limit, years, periods_per_year=26, match_rate=0.0,
+                          match_cap=0.0, salary_growth=SALARY_GROWTH, limit_growth=LIMIT_GROWTH):
+    """
+    Build per-period employee and employer contributions, shape (employees, years * periods_per_year).
+    Year 0 follows the calculator's schedule: periods_left paychecks of amount_per_period at the
+    end of the year. Later years defer percent_per_period of a growing salary, capped at a growing
+    limit. The employer matches match_rate of deferrals up to match_cap (a fraction of pay) per paycheck.
+    """
+    annual_salary = np.atleast_1d(np.asarray(annual_salary, dtype=np.float64))
+    periods_left = np.atleast_1d(np.asarray(periods_left, dtype=np.int64))
+    n = np.broadcast(annual_salary, periods_left, np.asarray(amount_per_period),
+                     np.asarray(percent_per_period), np.asarray(annual_limit)).shape[0]
+
+    year_index = np.repeat(np.arange(years), periods_per_year)
+    slot = np.tile(np.arange(periods_per_year), years)
+
+    # Pay per period, growing once a year
+    salary = annual_salary.reshape(-1, 1) * (1 + salary_growth) ** year_index
+    pay = np.broadcast_to(salary / periods_per_year, (n, year_index.size))
+
+    limit = np.asarray(annual_limit, dtype=np.float64).reshape(-1, 1) * (1 + limit_growth) ** year_index
+    rate = np.minimum(np.asarray(percent_per_period, dtype=np.float64).reshape(-1, 1), 100) / 100
+    employee = np.minimum(rate * pay, limit / periods_per_year)
+
+    # Year 0 is whatever is left of the current year
+    first_year = year_index == 0
+    in_first_year_schedule = slot >= periods_per_year - periods_left.reshape(-1, 1)
+    employee = np.where(first_year,
+                        np.where(in_first_year_schedule,
+                                 np.asarray(amount_per_period, dtype=np.float64).reshape(-1, 1), 0.0),
+                        employee)
+    employee = np.broadcast_to(employee, (n, year_index.size))
+
+    employer = np.asarray(match_rate, dtype=np.float64).reshape(-1, 1) * np.minimum(
+        employee, np.asarray(match_cap, dtype=np.float64).reshape(-1, 1) * pay)
+    return employee, employer
+
+
+def simulate_balances(starting_balance, contributions, n_paths=1000, periods_per_year=26,
+                      mean_return=MEAN_RETURN, volatility=VOLATILITY, seed=None):
+    """
+    Simulate account balances over n_paths lognormal return paths in one array pass.
+    `contributions` is (employees, periods) of total deposits per period.
+    Returns year-end balances with shape (employees, n_paths, years).
+    """
+    contributions = np.atleast_2d(contributions)
+    n, periods = contributions.shape
+    rng = np.random.default_rng(seed)
+
+    sigma = volatility / np.sqrt(periods_per_year)
+    mu = np.log1p(mean_return) / periods_per_year - sigma ** 2 / 2
+    log_growth = np.cumsum(mu + sigma * rng.standard_normal((n, n_paths, periods)), axis=2)
+    growth = np.exp(log_growth)
+
+    # B_t = G_t * (B_0 + sum_{s<=t} c_s / G_s), with deposits made at the end of each period
+    starting_balance = np.asarray(starting_balance, dtype=np.float64).reshape(-1, 1, 1)
+    balances = growth * (starting_balance + np.cumsum(contributions[:, None, :] / growth, axis=2))
+    return balances[:, :, periods_per_year - 1::periods_per_year]
+
+
+def project_retirement(starting_balance, annual_salary, periods_left, amount_per_period,
+                       percent_per_period, annual_limit, years=30, periods_per_year=26,
+                       n_paths=1000, match_rate=0.0, match_cap=0.0,
+                       salary_growth=SALARY_GROWTH, limit_growth=LIMIT_GROWTH,
+                       mean_return=MEAN_RETURN, volatility=VOLATILITY,
+                       percentiles=PERCENTILES, seed=None):
+    """
+    Project balances for one or more employees, starting from the calculator's results.
+    Returns a dict with year-end "percentiles" (employees, len(percentiles), years),
+    "mean" (employees, years) and the total "employee" and "employer" contributions.
+    """
+    employee, employer = contribution_schedule(
+        annual_salary, periods_left, amount_per_period, percent_per_period, annual_limit,
+        years, periods_per_year, match_rate, match_cap, salary_growth, limit_growth)
+    balances = simulate_balances(starting_balance, employee + employer, n_paths,
+                                 periods_per_year, mean_return, volatility, seed)
+    return {
+        "percentiles": np.percentile(balances, percentiles, axis=1).transpose(1, 0, 2),
+        "mean": balances.mean(axis=1),
+        "employee": employee.sum(axis=1),
+        "employer": employer.sum(axis=1),
+    }
+
+
+def project_population(starting_balance, annual_salary, periods_left, amount_per_period,
+                       percent_per_period, annual_limit, years=30, periods_per_year=26,
+                       n_paths=1000, chunk_size=None, seed=None, **assumptions):
+    """
+    Run project_retirement over a large population in chunks so memory stays bounded.
+    Per-employee arguments are arrays of equal length (scalars broadcast); the chunk size
+    defaults to what fits in MAX_CHUNK_BYTES. Yields (start, stop, result) per chunk.
+    """
+    columns = np.broadcast_arrays(*(np.atleast_1d(np.asarray(c)) for c in (
+        starting_balance, annual_salary, periods_left, amount_per_period,
+        percent_per_period, annual_limit)))
+    row_match = {name: np.broadcast_to(np.asarray(assumptions.pop(name, 0.0)), columns[0].shape)
+                 for name in ("match_rate", "match_cap")}
+
+    if chunk_size is None:
+        # simulate_balances holds about three (chunk, paths, periods) float64 arrays at once
+        per_employee = 3 * 8 * n_paths * years * periods_per_year
+        chunk_size = max(1, MAX_CHUNK_BYTES // per_employee)
+
+    rng = np.random.default_rng(seed)
+    for start in range(0, columns[0].shape[0], chunk_size):
+        stop = min(start + chunk_size, columns[0].shape[0])
+        chunk = [c[start:stop] for c in columns]
+        result = project_retirement(*chunk, years=years, periods_per_year=periods_per_year,
+                                    n_paths=n_paths, seed=rng,
+                                    **{name: values[start:stop] for name, values in row_match.items()},
+                                    **assumptions)
+        yield start, stop, result
@@ -0,0 +1,283 @@
+import itertools
+import sys
+from argparse import ArgumentParser
+
+import numpy as np
+
+
+def check_match_optimizer():
+    """optimize_contribution_schedule agrees with brute force over every whole-percent schedule."""
+    from match_optimizer import expand_schedule, optimize_contribution_schedule
+
+    rng = np.random.default_rng(9)
+    max_percent = 6
+    for _ in range(300):
+        periods = int(rng.integers(1, 5))
+        gross = float(rng.choice([1_000.0, 2_500.0, 3_333.33]))
+        remaining = float(rng.uniform(0, gross * max_percent / 100 * periods * 1.2))
+        match_rate = float(rng.choice([0.0, 0.5, 1.0]))
+        match_cap = float(rng.integers(0, max_percent + 1))
+
+        # Best schedule: most contributed without passing the limit, then most match
+        best = max(
+            (sum(percents) * gross / 100, match_rate * sum(min(p, match_cap) for p in percents) * gross / 100)
+            for percents in itertools.product(range(max_percent + 1), repeat=periods)
+            if sum(percents) * gross / 100 <= remaining + 1e-9
+        )
+
+        schedule = optimize_contribution_schedule(remaining, periods, gross, match_rate, match_cap, max_percent)
+        case = f"remaining={remaining:.2f} periods={periods} gross={gross} match={match_rate} cap={match_cap}"
+        assert np.isclose(schedule["total_contribution"], best[0]), f"contribution differs: {case}"
+        assert np.isclose(schedule["employer_match"], best[1]), f"match differs: {case}"
+        percents = expand_schedule(schedule)[0]
+        assert np.isclose(percents.sum() * gross / 100, best[0]), f"expanded schedule differs: {case}"
+        assert percents.max(initial=0) <= max_percent, f"schedule over max_percent: {case}"
+
+
+def check_batch_engine():
+    """process_scenarios matches calculate_401k_contribution row by row and rejects bad rows."""
+    import contextlib
+    import os
+    from datetime import date
+
+    from k401 import PAY_FREQUENCIES, calculate_401k_contribution
+    from k401_batch import process_scenarios
+
+    rng = np.random.default_rng(10)
+    as_of = date(2025, 6, 15)
+    rows = [{
+        "year": int(rng.choice([2024, 2025, 2026])),
+        "month": int(rng.integers(1, 13)),
+        "gross_pay": round(float(rng.uniform(500, 10_000)), 2),
+        "contributions_so_far": round(float(rng.uniform(0, 25_000)), 2),
+        "annual_limit": float(rng.choice([0, 23_500, 31_000])) or None,
+        "effective_periods": int(rng.integers(0, 5)),
+        "frequency": str(rng.choice(list(PAY_FREQUENCIES))),
+    } for _ in range(2_000)]
+
+    results = process_scenarios(rows, as_of)
+    # calculate_401k_contribution prints when it clamps effective periods
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for index, (row, result) in enumerate(zip(rows, results)):
+            expected = calculate_401k_contribution(row["year"], row["month"], row["gross_pay"],
+                                                   row["contributions_so_far"], result["annual_limit"],
+                                                   row["effective_periods"], row["frequency"], as_of=as_of)
+            for name in ("remaining_amount", "periods_left", "amount_per_period", "percent_per_period"):
+                assert np.isclose(result[name], expected[name]), f"row {index} {name}: {result[name]} != {expected[name]}"
+
+    valid = {"year": 2025, "month": 3, "gross_pay": 4_000, "contributions_so_far": 0}
+    for bad_row, message in ((dict(valid, month=13), "Row 1: month"),
+                             ({"year": 2025, "month": 3, "contributions_so_far": 0}, "Row 1: missing fields: gross_pay"),
+                             ([2025, 3], "Row 1: expected an object"),
+                             (dict(valid, year=2010), "Row 1: no 401(k) limits")):
+        try:
+            process_scenarios([valid, bad_row], as_of)
+        except ValueError as e:
+            assert str(e).startswith(message), f"wrong error for {bad_row}: {e}"
+        else:
+            raise AssertionError(f"no error for {bad_row}")
+
+
+def check_ptr_tokenizer():
+    """parse_transactions reads every transaction of the benchmark corpus with the right fields."""
+    from bench_ptr_parser import CORPUS_FILE, load_corpus
+    from ptr_extract import TRANSACTION_FIELDS, parse_transactions
+
+    # (owner, asset, ticker, asset type, transaction type, transaction date, notification date, min, max)
+    expected = [
+        ("SP", "Alphabet Inc. - Class A Common Stock", "GOOGL", "OP", "P", "01/14/2025", "01/14/2025", 250_001, 500_000),
+        ("SP", "Amazon.com, Inc.", "AMZN", "OP", "P", "01/14/2025", "01/14/2025", 250_001, 500_000),
+        ("", "Apple Inc.", "AAPL", "ST", "S (partial)", "12/31/2024", "01/02/2025", 1_000_001, 5_000_000),
+        ("JT", "NVIDIA Corporation - Common Stock", "NVDA", "ST", "S", "12/20/2024", "12/20/2024", 5_000_001, 25_000_000),
+        ("DC", "Vanguard Total Stock Market ETF", "VTI", "EF", "P", "01/10/2025", "01/13/2025", 1_001, 15_000),
+        ("SP", "Tempus AI, Inc. Class A Common Stock", "TEM", "OP", "P", "01/14/2025", "01/14/2025", 50_001, 100_000),
+        ("", "Blackstone Real Estate Income Trust", "", "RE", "E", "01/06/2025", "01/08/2025", 15_001, 50_000),
+        ("SP", "Microsoft Corporation - Common Stock", "MSFT", "ST", "S", "01/22/2025", "01/22/2025", 1_000_000, ""),
+    ]
+    transactions = parse_transactions(load_corpus(CORPUS_FILE)[0])
+    assert len(transactions) == len(expected), f"found {len(transactions)} transactions, expected {len(expected)}"
+    for transaction, row in zip(transactions, expected):
+        assert list(transaction) == TRANSACTION_FIELDS, f"fields differ: {list(transaction)}"
+        found = tuple(transaction[name] for name in ("owner", "asset", "ticker", "asset_type", "transaction_type",
+                                                     "transaction_date", "notification_date", "amount_min", "amount_max"))
+        assert found == row, f"{found} != {row}"
+
+    assert transactions[0]["description"].endswith("expiration date of 1/16/2026."), "multi-line description cut short"
+    assert transactions[2]["subholding_of"] == "Brokerage Account", "S O field missing"
+    assert transactions[6]["comment"] == "Exchanged for class I shares.", "C field missing"
+    assert transactions[6]["location"] == "New York, NY, US", "L field missing"
+    assert transactions[7]["amount"] == "Spouse/DC Over $1,000,000", "open-ended amount lost"
+
+
+def check_ptr_store():
+    """TransactionStore dedupes re-runs, applies every filter, and serves member lookups from its index."""
+    import os
+    import tempfile
+
+    from ptr_store import TransactionStore
+
+    def transaction(doc_id, line, member, ticker, transaction_type, transaction_date):
+        return {"doc_id": doc_id, "line": line, "member": member, "ticker": ticker,
+                "transaction_type": transaction_type, "transaction_date": transaction_date, "amount_min": 1_001}
+
+    filings = [
+        transaction("20020001", 0, "Doe", "AAPL", "P", "01/14/2025"),
+        transaction("20020001", 1, "Doe", "MSFT", "S (partial)", "02/03/2025"),
+        transaction("20020002", 0, "Roe", "AAPL", "S", "04/01/2025"),
+        transaction("20020003", 0, "doe", "NVDA", "E", "12/31/2024"),
+    ]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with TransactionStore(os.path.join(tmp_dir, "transactions.db")) as store:
+            assert store.add(filings) == 4, "first load did not store every transaction"
+            assert store.add(filings + [transaction("20020004", 0, "Roe", "TSLA", "P", "05/05/2025")]) == 1, \
+                "re-run stored duplicates"
+            assert store.count() == 5, f"store holds {store.count()} rows, expected 5"
+
+            assert store.count(member="DOE") == 3, "member filter is not case-insensitive"
+            assert store.count(ticker="aapl") == 2, "ticker filter"
+            assert store.count(transaction_type="S") == 2, "S does not match partial sales"
+            assert store.count(start="2025-01-01", end="2025-03-31") == 2, "date range"
+            assert store.count(doc_id=20020001) == 2, "doc_id filter"
+            dates = [row["transaction_date"] for row in store.query(member="doe")]
+            assert dates == ["2024-12-31", "2025-01-14", "2025-02-03"], f"dates not stored as sorted ISO: {dates}"
+
+            where, args = store._where(member="Doe", start="2025-01-01")
+            plan = " ".join(row[3] for row in store.connection.execute(
+                f"EXPLAIN QUERY PLAN SELECT * FROM transactions{where}", args))
+            assert "transactions_member_nocase" in plan, f"member query does not use its index: {plan}"
+
+
+def check_ptr_backfill():
+    """
+    backfill, with the download stages and extraction stubbed: the same PDF queued under
+    two years, failed and scanned filings, and the current year left open for the next run.
+    """
+    import collections
+    import contextlib
+    import os
+    import tempfile
+    from datetime import date
+
+    import ptr_backfill
+    from ptr_store import TransactionStore
+
+    this_year = date.today().year
+    old_year, last_year = this_year - 2, this_year - 1
+    filings = {
+        old_year: [("1", "Doe_1.pdf"), ("2", "Roe_2.pdf")],
+        last_year: [("3", "Doe_3.pdf"), ("4", "Bad_4.pdf"), ("5", "Scan_5.pdf")],
+        # The same PDFs queued again under another year
+        this_year: [("6", "Doe_6.pdf"), ("1", "Doe_1.pdf"), ("4", "Bad_4.pdf")],
+    }
+    broken = {"Bad_4.pdf"}
+    synced_years, extracted, scanned = [], [], []
+
+    def download_fd_archive(year, manifest=None):
+        synced_years.append(int(year))
+        return f"{year}FD.zip"
+
+    def download_pdfs_from_xml(fd_archive, pdf_dir, year, on_filing, **kwargs):
+        for doc_id, pdf_path in filings[int(year)]:
+            on_filing(doc_id, pdf_path)
+        return {"failed": []}
+
+    def extract(pdf_path, on_error, on_scanned):
+        extracted.append(pdf_path)
+        if pdf_path in broken:
+            on_error(pdf_path, "PdfminerException: No /Root object!")
+        elif pdf_path.startswith("Scan"):
+            on_scanned(pdf_path)
+        else:
+            yield pdf_path, [{"ticker": "AAPL", "transaction_type": "P", "transaction_date": "01/14/2025"}]
+
+    def extract_transactions_parallel(pdf_paths, workers, cache_dir, on_error, on_scanned):
+        # Like the process pool: several PDFs in flight, results in input order
+        pending = collections.deque()
+        for pdf_path in pdf_paths:
+            pending.append(pdf_path)
+            if len(pending) >= 4:
+                yield from extract(pending.popleft(), on_error, on_scanned)
+        while pending:
+            yield from extract(pending.popleft(), on_error, on_scanned)
+
+    stubs = {"download_fd_archive": download_fd_archive, "download_pdfs_from_xml": download_pdfs_from_xml,
+             "extract_transactions_parallel": extract_transactions_parallel, "queue_scanned_pdf": scanned.append}
+    originals = {name: getattr(ptr_backfill, name) for name in stubs}
+    years = [old_year, last_year, this_year]
+    with tempfile.TemporaryDirectory() as tmp_dir, open(os.devnull, "w") as devnull:
+        checkpoint_file = os.path.join(tmp_dir, "checkpoint.json")
+        try:
+            for name, stub in stubs.items():
+                setattr(ptr_backfill, name, stub)
+            with TransactionStore(os.path.join(tmp_dir, "transactions.db")) as store, \
+                    contextlib.redirect_stdout(devnull):
+                first = ptr_backfill.backfill(years, store, ptr_backfill.BackfillCheckpoint(checkpoint_file), None)
+                after_first = ptr_backfill.BackfillCheckpoint(checkpoint_file)
+                first_extracted = list(extracted)
+
+                # Next run: the broken PDF was fixed and a new filing arrived this year
+                broken.clear()
+                filings[this_year].append(("7", "Doe_7.pdf"))
+                synced_years.clear()
+                extracted.clear()
+                second = ptr_backfill.backfill(years, store, ptr_backfill.BackfillCheckpoint(checkpoint_file), None)
+                stored = store.count()
+        finally:
+            for name, original in originals.items():
+                setattr(ptr_backfill, name, original)
+        after_second = ptr_backfill.BackfillCheckpoint(checkpoint_file)
+
+    assert len(first_extracted) == 8, f"first run extracted {first_extracted}"
+    assert (first["filings"], first["failed"], first["scanned"]) == (5, 2, 1), f"first run totals {first}"
+    assert scanned == ["Scan_5.pdf"], f"OCR queue {scanned}"
+    assert after_first.is_year_complete(old_year), "ended year without failures not completed"
+    assert not after_first.is_year_complete(last_year), "year with a failed filing completed"
+
+    assert synced_years == [last_year, this_year], f"second run synced {synced_years}"
+    assert extracted == ["Bad_4.pdf", "Bad_4.pdf", "Doe_7.pdf"], f"second run extracted {extracted}"
+    assert (second["filings"], second["failed"], second["transactions"]) == (3, 0, 2), f"second run totals {second}"
+    assert after_second.is_year_complete(last_year), "ended year not completed once its failures were fixed"
+    assert not after_second.is_year_complete(this_year), "current year completed while filings may still arrive"
+    assert after_second.has_filing(this_year, "7"), "current year's filings not checkpointed"
+    assert stored == 6, f"store holds {stored} transactions, expected 6"
+
+
+# Checks run by default, in order
+CHECKS = {
+    "match_optimizer": check_match_optimizer,
+    "batch_engine": check_batch_engine,
+    "ptr_tokenizer": check_ptr_tokenizer,
+    "ptr_store": check_ptr_store,
+    "ptr_backfill": check_ptr_backfill,
+}
+
+
+def get_params():
+    parser = ArgumentParser(prog='self_check.py', description='Check the calculators and PTR pipeline against reference results')
+    parser.add_argument("checks", action="store", nargs="*", help=f"Checks to run (default: all): {', '.join(CHECKS)}")
+    params = parser.parse_args(sys.argv[1:])
+    unknown = [name for name in params.checks if name not in CHECKS]
+    if unknown:
+        parser.error(f"unknown checks: {', '.join(unknown)}")
+    return params
+
+
+def main():
+    params = get_params()
+    failed = 0
+    for name in params.checks or CHECKS:
+        try:
+            CHECKS[name]()
+            print(f"ok    {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"FAIL  {name}: {e}")
+        except Exception as e:
+            failed += 1
+            print(f"FAIL  {name}: {type(e).__name__}: {e}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
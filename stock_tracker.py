@@ -1,209 +1,225 @@
 import os
-import re
 import requests
-import xml.etree.ElementTree as ET
 import csv
-import pdfplumber
 from argparse import ArgumentParser
 import zipfile
 import sys
+from contextlib import contextmanager
+from datetime import date
+from ptr_extract import TEXT_CACHE_DIR, TRANSACTION_FIELDS, extract_transactions_parallel
+from ptr_download import RATE_LIMIT, WORKERS, download_archive, download_files
+from ptr_index import PTR_FILING_TYPES, FilingIndex
+from ptr_manifest import MANIFEST_FILE, FilingManifest
+from ptr_store import STORE_FILE, TransactionStore
 
 def get_params():
     parser = ArgumentParser(prog='senator.py', usage='Provide senator last name and year', description='A script to get senator trades for that year')
     parser.add_argument("-y", "--year", action="store", required=True)
     parser.add_argument("-l", "--last_name", action="store")
+    parser.add_argument("-w", "--workers", action="store", type=int, default=WORKERS, help="Concurrent PDF downloads")
+    parser.add_argument("--rate-limit", action="store", type=float, default=RATE_LIMIT, help="Max requests per second to the clerk's site (0 = unlimited)")
+    parser.add_argument("-s", "--state", action="store", help="Only filings for a state or state/district, e.g. CA or CA11")
+    parser.add_argument("--from", dest="start", action="store", type=date.fromisoformat, help="Only filings filed on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", action="store", type=date.fromisoformat, help="Only filings filed on or before this date (YYYY-MM-DD)")
+    parser.add_argument("-p", "--processes", action="store", type=int, default=None, help="Worker processes for PDF text extraction (default: one per CPU)")
+    parser.add_argument("--text-cache", action="store", default=TEXT_CACHE_DIR, help="Cache of extracted PDF text keyed by content hash (empty string disables)")
+    parser.add_argument("--db", action="store", default=STORE_FILE, help="SQLite store the transactions are appended to (empty string disables)")
+    parser.add_argument("-m", "--manifest", action="store", default=MANIFEST_FILE, help="Manifest of downloaded filings; only new filings are fetched")
     params = parser.parse_args(sys.argv[1:])
     return params
 
-# Function to download the XML file from a ZIP archive based on the year
-def download_and_extract_xml(year="2023", output_dir="xml_files"):
-    zip_url = f"https://disclosures-clerk.house.gov/public_disc/financial-pdfs/{year}FD.zip"
+# Public disclosure site of the Clerk of the House
+CLERK_URL = "https://disclosures-clerk.house.gov/public_disc"
+
+PDF_DIR = "pdf_downloads"  # Directory for downloaded PDFs
+OUTPUT_FILE = "transactions.csv"  # Output CSV file for transactions
+
+# Function to download the yearly ZIP archive holding the filings XML
+def download_fd_archive(year="2023", output_dir="xml_files", manifest=None):
+    """
+    Stream {year}FD.zip to disk and return its path; the XML inside is read
+    straight from the archive by open_fd_xml, so nothing is extracted.
+    """
+    zip_url = f"{CLERK_URL}/financial-pdfs/{year}FD.zip"
     zip_filename = os.path.join(output_dir, f"{year}FD.zip")
-    xml_filename = os.path.join(output_dir, f"{year}FD.xml")
     
     # Ensure output directory exists
     os.makedirs(output_dir, exist_ok=True)
 
+    # Only re-download the ZIP if it changed since the last sync
+    headers = manifest.conditional_headers(year) if manifest and os.path.exists(zip_filename) else {}
+
     try:
-        # Download the ZIP file
+        # Download the ZIP file in chunks instead of holding it in memory
         print(f"Downloading {zip_url}...")
-        response = requests.get(zip_url)
-        response.raise_for_status()  # Raise error for failed requests
-
-        # Save the ZIP file
-        with open(zip_filename, "wb") as zip_file:
-            zip_file.write(response.content)
+        result = download_archive(zip_url, zip_filename, headers)
+        if result is None:
+            print(f"{zip_url} not modified; using {zip_filename}")
+            return zip_filename
+        response_headers, size, sha256 = result
         print(f"Downloaded ZIP file: {zip_filename}")
+        if manifest:
+            manifest.record_archive(year, response_headers, size, sha256)
+            manifest.save()
 
-        # Extract the XML file from the ZIP archive
-        with zipfile.ZipFile(zip_filename, 'r') as zip_ref:
-            zip_ref.extractall(output_dir)  # Extract all contents to the output directory
-        print(f"Extracted XML file: {xml_filename}")
-
-        return xml_filename  # Return the path to the extracted XML file
+        return zip_filename
 
     except requests.exceptions.RequestException as e:
         print(f"Failed to download {zip_url}: {e}")
         return None
-    
+
+@contextmanager
+def open_fd_xml(path):
+    """Open the filings XML for reading, directly out of an FD ZIP archive or from a plain .xml file."""
+    if not zipfile.is_zipfile(path):
+        with open(path, "rb") as xml_file:
+            yield xml_file
+        return
+    with zipfile.ZipFile(path) as archive:
+        xml_members = [name for name in archive.namelist() if name.lower().endswith(".xml")]
+        if not xml_members:
+            raise ValueError(f"No XML file in {path}")
+        with archive.open(xml_members[0]) as xml_file:
+            yield xml_file
+
+def pdf_filename(last_name, doc_id):
+    return f"{last_name}_{doc_id}.pdf"
+
+def parse_pdf_filename(pdf_path):
+    """(last name, DocID) of a PDF saved by download_pdfs_from_xml."""
+    last_name, _, doc_id = os.path.splitext(os.path.basename(pdf_path))[0].rpartition("_")
+    return last_name, doc_id
+
 # Function to parse XML and download PDFs with a parameterized year
-def download_pdfs_from_xml(xml_file, output_dir, member_last_name=None, year="2024"):
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
+def download_pdfs_from_xml(xml_file, output_dir, member_last_name=None, year="2024",
+                           workers=WORKERS, rate_limit=RATE_LIMIT, manifest=None,
+                           state=None, start=None, end=None, filing_types=PTR_FILING_TYPES, on_filing=None):
+    """
+    Download the PDFs of the filings matching the filters, skipping those the manifest
+    already has. on_filing(doc_id, output_file) is called for every matching filing
+    whose PDF is on disk: right away for ones already downloaded, else as each arrives.
+    """
+    # Build the PTR index in one streaming pass, then filter it instead of scanning members
+    with open_fd_xml(xml_file) as xml_stream:
+        index = FilingIndex.from_xml(xml_stream, filing_types)
+    filings = index.query(last_name=member_last_name, state=state, start=start, end=end)
+    print(f"Found {len(filings)} matching filings out of {len(index)} of type {', '.join(filing_types)}")
 
     # Ensure output directory exists
     os.makedirs(output_dir, exist_ok=True)
 
-    for member in root.findall(".//Member"):
-        last_name = member.find("Last").text
-        doc_id = member.find("DocID").text
-
-        # If a specific member is provided, skip others
-        if member_last_name and last_name.lower() != member_last_name.lower():
-            continue
-
+    jobs = []
+    doc_ids = {}
+    skipped = 0
+    for filing in filings:
         # Parameterized URL with year
-        pdf_url = f"https://disclosures-clerk.house.gov/public_disc/ptr-pdfs/{year}/{doc_id}.pdf"
-        output_file = os.path.join(output_dir, f"{last_name}_{doc_id}.pdf")
-
-        try:
-            response = requests.get(pdf_url)
-            response.raise_for_status()  # Raise error for failed requests
-            with open(output_file, "wb") as file:
-                file.write(response.content)
-            print(f"Downloaded: {output_file}")
-        except requests.exceptions.RequestException as e:
-            print(f"Failed to download {pdf_url}: {e}")
-
-def extract_text_from_pdf_with_pdfplumber(pdf_path):
-    extracted_text = ''
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            extracted_text += page.extract_text()  # Extracts text from each page
-    return extracted_text
-
-def clean_extracted_text(text):
-    # First, replace unwanted characters (except for newlines) with a placeholder
-    # Keep \n (newlines) intact and replace other control characters and non-printable characters
-    text = re.sub(r'[^\x20-\x7E\n]', '', text)  # Remove non-ASCII printable characters except newline
-    
-    # Then, normalize excessive spaces to a single space (preserve newlines)
-    text = re.sub(r'[ \t]+', ' ', text)  # Replace multiple spaces and tabs with a single space
-    
-    # Optional: Clean up unnecessary spaces around newlines, if required
-    text = re.sub(r'\n+', '\n', text)  # Replace multiple newlines with a single newline
-    
-    return text
-
-# Function to parse the data
-def parse_transactions(data):
-    # Split the input text by lines
-    lines = data.split("\n")
-    transactions = []
-    
-    # Temporary variables to store data
-    ticker = None
-    transaction_type = None
-    transaction_date = None
-    description = None
-    
-    # Iterate over each line in the data
-    for line in lines:
-        # Strip line to avoid leading/trailing spaces causing issues
-        line = line.strip()
-        
-        # Debugging output for each line being processed
-        #print(f"Processing line: {line}")
-
-        # Step 1: Extract Ticker symbol from parentheses (e.g., (AVGO))
-        ticker_match = re.search(r'\((\w+)\)', line)
-        if ticker_match:
-            ticker = ticker_match.group(1)
-            #print(ticker)
-
-        # Step 2: Extract Transaction Type (P or S)
-        if 'P' in line or 'S' in line:
-            if 'P' in line:
-                transaction_type = 'P'
-            elif 'S' in line:
-                transaction_type = 'S'
-        
-        # Step 3: Extract Date in MM/DD/YYYY format
-        date_match = re.search(r'(\d{2}/\d{2}/\d{4})', line)
-        if date_match:
-            transaction_date = date_match.group(1)
-        #print(transaction_date)
-        # Step 4: Extract Description starting with D: till the end of the line
-        if 'D:' or 'DESCRIPTION:' or 'S O:' in line.upper():
-            print(f"Processing line: {line}")
-            description_match = re.search(r'D:\s*(.*)|DESCRIPTION:\s*(.*)|O:\s*(.*)', line)
-            
-            if description_match:
-                description = description_match.group(0).strip()
-            #elif description_match is None:
-            #    description = "NA"
-
-                # Now, append the extracted values to the transaction list
-                if ticker and transaction_type and transaction_date and description:
-                    transaction_data = {
-                        "asset": ticker,
-                        "transaction_type": transaction_type,
-                        "transaction_date": transaction_date,
-                        "description": description
-                    }
-                    #print(f"Parsed Transaction: {transaction_data}")
-                    transactions.append(transaction_data)
-
-                    # Reset temporary variables to avoid reusing previous transaction data
-                    ticker = transaction_type = transaction_date = description = None
-
-    return transactions
-
+        pdf_url = f"{CLERK_URL}/ptr-pdfs/{year}/{filing.doc_id}.pdf"
+        output_file = os.path.join(output_dir, pdf_filename(filing.last_name, filing.doc_id))
+
+        # Skip filings the manifest says we already have
+        if manifest and manifest.has_filing(year, filing.doc_id, output_file):
+            skipped += 1
+            if on_filing:
+                on_filing(filing.doc_id, output_file)
+            continue
+        jobs.append((pdf_url, output_file))
+        doc_ids[output_file] = filing.doc_id
+
+    if skipped:
+        print(f"Skipping {skipped} filings already in the manifest")
+
+    def record(url, output_file, size, sha256):
+        if manifest:
+            manifest.record_filing(year, doc_ids[output_file], output_file, size, sha256)
+            # Save as we go so an interrupted sync resumes where it stopped
+            if len(manifest.filings) % 50 == 0:
+                manifest.save()
+        if on_filing:
+            on_filing(doc_ids[output_file], output_file)
+
+    # Download concurrently over one pooled session, with retry and a per-host rate limit
+    stats = download_files(jobs, workers, rate_limit, on_download=record)
+    if manifest:
+        manifest.save()
+    return stats
+
+def iter_pdf_paths(pdf_dir):
+    """Paths of the PDFs in pdf_dir, in file-name order."""
+    for pdf_file in sorted(entry.name for entry in os.scandir(pdf_dir) if entry.name.endswith(".pdf")):
+        yield os.path.join(pdf_dir, pdf_file)
+
+def iter_transactions(pdf_paths, workers=None, cache_dir=TEXT_CACHE_DIR):
+    """
+    Stream transactions out of a stream of PDF paths as each PDF is parsed, tagged with
+    the filing (DocID, member, line within the filing) and PDF they came from.
+    Nothing is accumulated, so any number of filings fits in memory.
+    """
+    # Extract and parse across a process pool; results come back in input order
+    for pdf_path, transactions in extract_transactions_parallel(pdf_paths, workers, cache_dir):
+        yield from tag_transactions(pdf_path, transactions)
+
+def tag_transactions(pdf_path, transactions):
+    """Add the DocID, member, line within the filing and source PDF to each transaction."""
+    member, doc_id = parse_pdf_filename(pdf_path)
+    for line, transaction in enumerate(transactions, 1):
+        transaction.update(doc_id=doc_id, member=member, line=line)
+        transaction["source_file"] = os.path.basename(pdf_path)  # Add source file info
+        yield transaction
+
+def print_transactions(transactions):
+    """Print each transaction as it streams past."""
+    for transaction in transactions:
+        print(transaction)
+        yield transaction
 
 # Function to process PDFs and extract transactions
-def process_pdfs_and_extract_transactions(pdf_dir, output_file):
-    all_transactions = []
-    for pdf_file in os.listdir(pdf_dir):
-        if pdf_file.endswith(".pdf"):
-            pdf_path = os.path.join(pdf_dir, pdf_file)
-            print(f"Processing {pdf_path}...")
-            text = extract_text_from_pdf_with_pdfplumber(pdf_path)
-            clean_data = clean_extracted_text(text)
-            #print(clean_data)
-            if clean_data:
-                parsed_transactions = parse_transactions(clean_data)
-                for transaction in parsed_transactions:
-                    print(transaction)
-                    transaction["source_file"] = pdf_file  # Add source file info
-                    all_transactions.append(transaction)
-
-    # Save all transactions to a CSV file
-    save_transactions_to_csv(all_transactions, output_file)
+def process_pdfs_and_extract_transactions(pdf_dir, output_file, workers=None, cache_dir=TEXT_CACHE_DIR, store=None):
+    transactions = iter_transactions(iter_pdf_paths(pdf_dir), workers, cache_dir)
+    transactions = print_transactions(transactions)
+    if store:
+        # Also append to the transaction store; filings already stored are left as they are
+        transactions = store.record(transactions)
+    # Rows are written as they are parsed
+    rows = save_transactions_to_csv(transactions, output_file)
+    if store:
+        print(f"Added {store.inserted} new transactions to {store.path}")
+    return rows
 
 # Function to save transactions to CSV
 def save_transactions_to_csv(transactions, output_file):
+    """Write a stream of transactions to output_file row by row; returns the row count."""
+    rows = 0
     with open(output_file, "w", newline="", encoding="utf-8") as csvfile:
-        fieldnames = ["asset", "transaction_type", "transaction_date", "description", "source_file"]
+        fieldnames = ["doc_id", "member", "line"] + TRANSACTION_FIELDS + ["source_file"]
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
         writer.writeheader()
-        writer.writerows(transactions)
-    print(f"Transactions saved to {output_file}")
-
-# main
-
-# Assign the params
-params = get_params()
-year=params.year
-last_name=params.last_name
-
-pdf_dir = "pdf_downloads"  # Directory for downloaded PDFs
-output_file = "transactions.csv"  # Output CSV file for transactions
-
-print("Downloading and extracting XML...")
-xml_file = download_and_extract_xml(year=year)
-
-print("Downloading PDFs...")
-download_pdfs_from_xml(xml_file, pdf_dir, last_name, year)
+        for transaction in transactions:
+            writer.writerow(transaction)
+            rows += 1
+    print(f"Transactions saved to {output_file} ({rows} rows)")
+    return rows
+
+def main():
+    # Assign the params
+    params = get_params()
+
+    print("Downloading the filings archive...")
+    manifest = FilingManifest(params.manifest)
+    fd_archive = download_fd_archive(year=params.year, manifest=manifest)
+    if fd_archive is None:
+        sys.exit(1)
+
+    print("Downloading PDFs...")
+    download_pdfs_from_xml(fd_archive, PDF_DIR, params.last_name, params.year, params.workers, params.rate_limit,
+                           manifest, params.state, params.start, params.end)
+
+    print("Extracting transactions from PDFs...")
+    store = TransactionStore(params.db) if params.db else None
+    try:
+        process_pdfs_and_extract_transactions(PDF_DIR, OUTPUT_FILE, params.processes, params.text_cache, store)
+    finally:
+        if store:
+            store.close()
 
-print("Extracting transactions from PDFs...")
-process_pdfs_and_extract_transactions(pdf_dir, output_file)
+if __name__ == "__main__":
+    main()